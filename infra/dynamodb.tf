@@ -0,0 +1,14 @@
+locals {
+  lease_table_name = "${var.env}-app-ddbtable-${var.project_code}"
+}
+
+resource "aws_dynamodb_table" "leases" {
+  name         = local.lease_table_name
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "lease_name"
+
+  attribute {
+    name = "lease_name"
+    type = "S"
+  }
+}
@@ -35,6 +35,27 @@ module "lambda_execution_role" {
           ),
         ]
       }
+      LayoutLease = {
+        effect = "Allow"
+        actions = [
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
+        ]
+        resources = [aws_dynamodb_table.leases.arn]
+      }
+      SelfInvoke = {
+        effect  = "Allow"
+        actions = ["lambda:InvokeFunction"]
+        resources = [
+          format(
+            "arn:aws:lambda:%s:%s:function:%s",
+            var.region,
+            data.aws_caller_identity.current.account_id,
+            local.function_name
+          ),
+        ]
+      }
     }
   }
 }
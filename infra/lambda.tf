@@ -36,5 +36,8 @@ module "lambda_function" {
     GOOGLE_SHEET_ID_PARAM        = aws_ssm_parameter.google_sheet_id.name
     GOOGLE_SERVICE_ACCOUNT_PARAM = aws_ssm_parameter.google_service_account_json.name
     BROADCAST_CHAT_ID_PARAM      = aws_ssm_parameter.broadcast_chat_id.name
+    LAYOUT_LEASE_TABLE           = aws_dynamodb_table.leases.name
+    WEBHOOK_PROCESSING_MODE      = var.webhook_processing_mode
+    WEBHOOK_REPLY_ENABLED        = tostring(var.webhook_reply_enabled)
   }
 }
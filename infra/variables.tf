@@ -16,6 +16,17 @@ variable "google_sheet_name" {
   default     = "Attendance"
 }
 
+variable "webhook_processing_mode" {
+  description = "inline processes updates before answering the webhook; deferred answers first and processes them in an async self-invocation."
+  default     = "inline"
+}
+
+variable "webhook_reply_enabled" {
+  description = "Return the last sendMessage of an inline update as the webhook response instead of a separate Bot API call."
+  type        = bool
+  default     = false
+}
+
 variable "ssm_parameter_prefix" {
   description = "Prefix for SSM Parameter Store paths."
   default     = null
@@ -2,8 +2,7 @@
 import argparse
 import json
 
-from src.app import handler
-from src.bot.application import run_polling
+from src.app import handler, wait_for_deferred_updates
 
 
 class _LocalContext:
@@ -21,20 +20,31 @@ def _invoke_reminder(training_date):
 def _invoke_update(path):
     with open(path, "r", encoding="utf-8") as file_handle:
         payload = json.load(file_handle)
+    if isinstance(payload, list):
+        # A list of updates goes through the batch (queue) entry point.
+        records = [
+            {"messageId": str(index), "body": json.dumps(update)}
+            for index, update in enumerate(payload)
+        ]
+        return handler({"Records": records}, _LocalContext())
     event = {
         "body": json.dumps(payload),
         "isBase64Encoded": False,
         "requestContext": {"http": {"method": "POST", "path": "/webhook"}},
     }
-    return handler(event, _LocalContext())
+    response = handler(event, _LocalContext())
+    # In deferred mode the update is still queued when the webhook has been acknowledged.
+    wait_for_deferred_updates()
+    return response
 
 
 def main():
     parser = argparse.ArgumentParser(description="Run the bot locally.")
     parser.add_argument("--polling", action="store_true", help="Run Telegram polling loop.")
+    parser.add_argument("--serve", action="store_true", help="Run the self-hosted webhook server.")
     parser.add_argument("--weekly", action="store_true", help="Trigger weekly job once.")
     parser.add_argument("--reminder", help="Trigger reminder job for YYYY-MM-DD.")
-    parser.add_argument("--update", help="Process a Telegram update JSON file.")
+    parser.add_argument("--update", help="Process a Telegram update JSON file (one update or a list).")
     args = parser.parse_args()
 
     if args.weekly:
@@ -47,11 +57,19 @@ def main():
         _invoke_update(args.update)
         return
 
+    if args.serve:
+        from src.bot.webhook_server import run_webhook_server
+
+        run_webhook_server()
+        return
+
     if args.polling:
+        from src.bot.application import run_polling
+
         run_polling()
         return
 
-    raise SystemExit("No action specified. Use --polling, --weekly, --reminder, or --update.")
+    raise SystemExit("No action specified. Use --polling, --serve, --weekly, --reminder, or --update.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Measure cold-start cost: `import src.app` and time to the first processed update.
+
+Each sample runs in a fresh interpreter, so numbers reflect a cold container rather
+than warm module caches. The update benchmark runs `main.py --update` and needs the
+same `.env` as a local run (bot token, sheet id, service account).
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_UPDATE_PATH = os.path.join(REPO_ROOT, "scripts", "sample_update.json")
+# Dependencies that must stay off the `import src.app` path; they load when a code path needs them.
+HEAVY_MODULES = ("boto3", "google.auth", "httpx", "telegram")
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*src\.app$")
+LOADED_MODULES_SCRIPT = (
+    "import sys, src.app; "
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+
+
+def _run(args, env):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+
+def _build_env():
+    env = dict(os.environ)
+    # Deferred mode would hand the update to a worker thread and exit before it ran.
+    env["WEBHOOK_PROCESSING_MODE"] = "inline"
+    env["WEBHOOK_REPLY_ENABLED"] = "false"
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    return env
+
+
+def measure_import_ms(env):
+    result = _run(["-X", "importtime", "-c", "import src.app"], env)
+    if result.returncode != 0:
+        raise RuntimeError(f"import src.app failed:\n{result.stderr}")
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line.strip())
+        if match:
+            return int(match.group(1)) / 1000.0
+    raise RuntimeError("importtime output did not include src.app")
+
+
+def find_loaded_heavy_modules(env):
+    result = _run(["-c", LOADED_MODULES_SCRIPT], env)
+    if result.returncode != 0:
+        raise RuntimeError(f"import src.app failed:\n{result.stderr}")
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+def measure_update_ms(env, update_path):
+    started_at = time.perf_counter()
+    result = _run(["main.py", "--update", update_path], env)
+    elapsed_ms = (time.perf_counter() - started_at) * 1000.0
+    if result.returncode != 0:
+        raise RuntimeError(f"main.py --update failed:\n{result.stderr}")
+    return elapsed_ms
+
+
+def _summarize(label, samples):
+    print(
+        f"{label}: median {statistics.median(samples):.1f} ms "
+        f"(min {min(samples):.1f}, max {max(samples):.1f}, runs {len(samples)})"
+    )
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import and update latency.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement.")
+    parser.add_argument("--update", default=DEFAULT_UPDATE_PATH, help="Telegram update JSON file.")
+    parser.add_argument("--skip-update", action="store_true", help="Only measure imports.")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median import exceeds this.")
+    parser.add_argument("--max-update-ms", type=float, help="Fail if the median update exceeds this.")
+    args = parser.parse_args()
+
+    env = _build_env()
+    failures = []
+
+    import_ms = _summarize(
+        "import src.app",
+        [measure_import_ms(env) for _ in range(args.runs)],
+    )
+    loaded_modules = find_loaded_heavy_modules(env)
+    print(f"heavy modules loaded by import src.app: {', '.join(loaded_modules) or 'none'}")
+    if loaded_modules:
+        failures.append(f"import src.app loads {', '.join(loaded_modules)}")
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        failures.append(f"import median {import_ms:.1f} ms > {args.max_import_ms:.1f} ms")
+
+    if not args.skip_update:
+        update_ms = _summarize(
+            "main.py --update (process start to exit)",
+            [measure_update_ms(env, args.update) for _ in range(args.runs)],
+        )
+        if args.max_update_ms is not None and update_ms > args.max_update_ms:
+            failures.append(f"update median {update_ms:.1f} ms > {args.max_update_ms:.1f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
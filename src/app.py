@@ -2,12 +2,25 @@ import base64
 import json
 import logging
 
-from .bot.application import process_update_sync
+from .bot.deferred import (
+    DEFERRED_UPDATE_KEY,
+    LambdaUpdateQueue,
+    LocalUpdateQueue,
+    is_valid_update,
+)
+from .clients import get_lambda_client
+from .config import (
+    get_lambda_function_name,
+    get_webhook_processing_mode,
+    get_webhook_reply_enabled,
+)
 
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+_UPDATE_QUEUE = None
+
 
 def _parse_api_gateway_body(event):
     body = event.get("body") or ""
@@ -18,10 +31,93 @@ def _parse_api_gateway_body(event):
     return json.loads(body)
 
 
+def _process_update(update_payload, webhook_reply=False):
+    # The telegram/Sheets stack is only imported once an update is actually processed,
+    # so deferred acknowledgements never pay for it.
+    from .bot.application import process_update_sync
+
+    return process_update_sync(update_payload, webhook_reply=webhook_reply)
+
+
+def _process_updates(update_payloads):
+    from .bot.application import process_updates_sync
+
+    return process_updates_sync(update_payloads)
+
+
+def _process_queue_records(records):
+    # SQS-style batch: each record body is one Telegram update. Failed updates are reported
+    # back as batchItemFailures so only those records are redelivered.
+    message_ids_by_update_id = {}
+    updates = []
+    for record in records:
+        try:
+            update = json.loads(record.get("body") or "")
+        except ValueError:
+            update = None
+        if not is_valid_update(update):
+            logger.warning("Dropping invalid queued update %s.", record.get("messageId"))
+            continue
+        message_ids_by_update_id.setdefault(update["update_id"], record.get("messageId"))
+        updates.append(update)
+
+    failed_update_ids = _process_updates(updates) if updates else []
+    return {
+        "batchItemFailures": [
+            {"itemIdentifier": message_ids_by_update_id[update_id]}
+            for update_id in failed_update_ids
+            if message_ids_by_update_id.get(update_id)
+        ]
+    }
+
+
+def _get_update_queue():
+    global _UPDATE_QUEUE
+    if _UPDATE_QUEUE is None:
+        function_name = get_lambda_function_name()
+        if function_name:
+            _UPDATE_QUEUE = LambdaUpdateQueue(get_lambda_client(), function_name)
+        else:
+            _UPDATE_QUEUE = LocalUpdateQueue(_process_update)
+    return _UPDATE_QUEUE
+
+
+def wait_for_deferred_updates():
+    # The local worker is a daemon thread, so a one-shot run must wait for it before exiting.
+    if _UPDATE_QUEUE is not None:
+        _UPDATE_QUEUE.join()
+
+
+def _acknowledge_update(event):
+    try:
+        update = _parse_api_gateway_body(event)
+    except ValueError:
+        return {"statusCode": 400, "body": "invalid update"}
+    if not is_valid_update(update):
+        return {"statusCode": 400, "body": "invalid update"}
+    _get_update_queue().enqueue(update)
+    return {"statusCode": 200, "body": "ok"}
+
+
 def handler(event, context):
+    if DEFERRED_UPDATE_KEY in event:
+        _process_update(event[DEFERRED_UPDATE_KEY])
+        return {"statusCode": 200, "body": "ok"}
+
+    if "Records" in event:
+        return _process_queue_records(event["Records"])
+
     if "requestContext" in event:
+        if get_webhook_processing_mode() == "deferred":
+            return _acknowledge_update(event)
         update = _parse_api_gateway_body(event) or {}
-        process_update_sync(update)
+        reply_body = _process_update(update, webhook_reply=get_webhook_reply_enabled())
+        if reply_body:
+            return {
+                "statusCode": 200,
+                "headers": {"Content-Type": "application/json"},
+                "body": json.dumps(reply_body),
+            }
         return {"statusCode": 200, "body": "ok"}
 
     return {"statusCode": 200, "body": "ok"}
@@ -1,21 +1,32 @@
 """python-telegram-bot runtime wiring for Lambda update processing."""
 
 import asyncio
+from contextvars import ContextVar
+import logging
 
 from telegram import Update
 from telegram.ext import CommandHandler, PollAnswerHandler
 
 from ..clients import build_telegram_application
+from ..constants import POLLING_CONCURRENT_UPDATES, VOTE_QUEUE_FLUSH_INTERVAL_SECONDS
 from ..config import (
+    get_admin_cache_ttl_seconds,
     get_google_sheet_id,
     get_google_sheet_name,
+    get_layout_lease_table_name,
     get_telegram_bot_token,
     load_service_account_info,
 )
-from ..sheets.client import GoogleSheetsClient
+from ..sheets.async_client import AsyncGoogleSheetsClient
+from ..sheets.common import UNAVAILABLE_MESSAGE, SheetsError, SheetsRetryableError
+from ..sheets.lease import create_layout_lease
 from ..sheets.service import SheetsService
+from ..sheets.vote_queue import VoteQueue
+from .dedup import UpdateDeduplicator
+from .webhook_reply import capture_webhook_reply
 from .handlers import (
     BOT_DATA_SHEETS_SERVICE_KEY,
+    BOT_DATA_VOTE_QUEUE_KEY,
     handle_add_training,
     handle_cancel_training,
     handle_chase,
@@ -23,27 +34,40 @@ from .handlers import (
     handle_help,
     handle_poll_answer,
     handle_poll,
+    handle_refresh_admins,
     handle_repoll,
     handle_register,
     handle_register_chat,
 )
+logger = logging.getLogger(__name__)
+
 _APP = None
 _BOT = None
 _APP_READY = False
 _LOOP = None
+_UPDATE_DEDUPLICATOR = UpdateDeduplicator()
+# Errors raised by handlers for the update being dispatched; PTB reports them to the error
+# handler instead of raising from process_update.
+_HANDLER_ERRORS = ContextVar("telegram_handler_errors", default=None)
 
 
-def _build_application():
+def _build_application(vote_flush_interval=None, concurrent_updates=False):
     sheets_info = load_service_account_info()
-    sheets_client = GoogleSheetsClient.create_from_service_account_info(sheets_info)
+    sheets_client = AsyncGoogleSheetsClient.create_from_service_account_info(sheets_info)
     sheets_service = SheetsService(
         sheets_client,
         get_google_sheet_id(),
         get_google_sheet_name(),
+        admin_cache_ttl=get_admin_cache_ttl_seconds(),
+        layout_lease=create_layout_lease(get_layout_lease_table_name()),
     )
-    app = build_telegram_application(get_telegram_bot_token())
+    app = build_telegram_application(get_telegram_bot_token(), concurrent_updates=concurrent_updates)
 
     app.bot_data[BOT_DATA_SHEETS_SERVICE_KEY] = sheets_service
+    app.bot_data[BOT_DATA_VOTE_QUEUE_KEY] = VoteQueue(
+        sheets_service,
+        flush_interval=vote_flush_interval,
+    )
 
     app.add_handler(CommandHandler("register", handle_register))
     app.add_handler(CommandHandler("register_chat", handle_register_chat))
@@ -54,10 +78,21 @@ def _build_application():
     app.add_handler(CommandHandler("poll", handle_poll))
     app.add_handler(CommandHandler("repoll", handle_repoll))
     app.add_handler(CommandHandler("chase", handle_chase))
+    app.add_handler(CommandHandler("refresh_admins", handle_refresh_admins))
     app.add_handler(PollAnswerHandler(handle_poll_answer))
+    app.add_error_handler(_record_handler_error)
     return app
 
 
+async def _record_handler_error(update, context):
+    handler_errors = _HANDLER_ERRORS.get()
+    if handler_errors is None:
+        # Polling: nothing redelivers the update, so just log it.
+        logger.error("Failed to process update.", exc_info=context.error)
+        return
+    handler_errors.append(context.error)
+
+
 def _get_event_loop():
     global _LOOP, _APP, _APP_READY, _BOT
     if _LOOP is None or _LOOP.is_closed():
@@ -80,18 +115,144 @@ async def _get_application():
     return _APP
 
 
-async def process_update_async(update_payload):
+async def process_update_async(update_payload, webhook_reply=False):
+    # Marked seen only once the app is up: a failed start must not swallow the redelivery.
     app = await _get_application()
-    update = Update.de_json(update_payload, app.bot)
-    await app.process_update(update)
+    update_id = update_payload.get("update_id")
+    if not _UPDATE_DEDUPLICATOR.mark_seen(update_id):
+        logger.info("Skipping already processed update %s.", update_id)
+        return None
+
+    if not webhook_reply:
+        await _process_update(app, update_payload)
+        return None
+
+    with capture_webhook_reply() as reply:
+        try:
+            await _process_update(app, update_payload)
+        except Exception:
+            await app.bot.send_held_reply(reply)
+            raise
+    return reply.to_response_body()
+
+
+async def process_updates_async(update_payloads):
+    # Updates run in arrival order, but poll answers only queue up and are written in one
+    # flush at the end, against a single snapshot. Returns the update_ids that failed.
+    app = await _get_application()
+    update_payloads = [
+        update_payload
+        for update_payload in update_payloads
+        if _UPDATE_DEDUPLICATOR.mark_seen(update_payload.get("update_id"))
+    ]
+    if not update_payloads:
+        return []
+
+    poll_ids = {
+        update_payload["poll_answer"].get("poll_id")
+        for update_payload in update_payloads
+        if update_payload.get("poll_answer")
+    }
+    if poll_ids:
+        try:
+            await app.bot_data[BOT_DATA_SHEETS_SERVICE_KEY].ensure_polls_indexed(poll_ids)
+        except SheetsError:
+            logger.warning("Could not preload poll metadata; answers will look it up one by one.")
+
+    failed_update_ids = []
+    with app.bot_data[BOT_DATA_VOTE_QUEUE_KEY].hold():
+        for update_payload in update_payloads:
+            try:
+                await _dispatch_update(app, update_payload)
+            except Exception:
+                logger.exception("Failed to process update %s.", update_payload.get("update_id"))
+                failed_update_ids.append(update_payload.get("update_id"))
+
+    if not await _flush_vote_queue(app):
+        # The answers stay queued in memory, but report them so the source redelivers.
+        for update_payload in update_payloads:
+            update_id = update_payload.get("update_id")
+            if update_payload.get("poll_answer") and update_id not in failed_update_ids:
+                _UPDATE_DEDUPLICATOR.forget(update_id)
+                failed_update_ids.append(update_id)
+    return failed_update_ids
+
+
+async def _process_update(app, update_payload):
+    try:
+        await _dispatch_update(app, update_payload)
+    finally:
+        # Lambda may freeze the container after we return, so queued votes go out now.
+        flushed = await _flush_vote_queue(app)
+    if not flushed and update_payload.get("poll_answer"):
+        # The answer is not in the sheet; fail the update so Telegram redelivers it.
+        _UPDATE_DEDUPLICATOR.forget(update_payload.get("update_id"))
+        raise SheetsRetryableError(UNAVAILABLE_MESSAGE)
+
 
+async def _dispatch_update(app, update_payload):
+    handler_errors = []
+    token = _HANDLER_ERRORS.set(handler_errors)
+    try:
+        update = Update.de_json(update_payload, app.bot)
+        await app.process_update(update)
+        if handler_errors:
+            if update_payload.get("poll_answer"):
+                # Recording an answer is idempotent, so a redelivery is safe.
+                raise handler_errors[0]
+            # Commands may already have posted messages or polls; a redelivery would repeat them.
+            logger.error(
+                "Failed to process update %s.",
+                update_payload.get("update_id"),
+                exc_info=handler_errors[0],
+            )
+    except Exception:
+        # Let Telegram's redelivery retry an update that failed outright.
+        _UPDATE_DEDUPLICATOR.forget(update_payload.get("update_id"))
+        raise
+    finally:
+        _HANDLER_ERRORS.reset(token)
 
-def process_update_sync(update_payload):
+
+async def _flush_vote_queue(app):
+    try:
+        await app.bot_data[BOT_DATA_VOTE_QUEUE_KEY].flush()
+    except Exception:
+        logger.exception("Failed to flush queued poll answers.")
+        return False
+    return True
+
+
+async def shutdown_application():
+    global _APP, _APP_READY, _BOT
+    if _APP is None:
+        return
+    app = _APP
+    _APP = None
+    _BOT = None
+    await _flush_vote_queue(app)
+    if _APP_READY:
+        _APP_READY = False
+        await app.shutdown()
+    await app.bot_data[BOT_DATA_SHEETS_SERVICE_KEY].client.aclose()
+
+
+def process_update_sync(update_payload, webhook_reply=False):
     loop = _get_event_loop()
+    coroutine = process_update_async(update_payload, webhook_reply=webhook_reply)
     if loop.is_running():
-        future = asyncio.run_coroutine_threadsafe(process_update_async(update_payload), loop)
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
         return future.result()
-    return loop.run_until_complete(process_update_async(update_payload))
+    return loop.run_until_complete(coroutine)
+
+
+def process_updates_sync(update_payloads):
+    loop = _get_event_loop()
+    coroutine = process_updates_async(update_payloads)
+    if loop.is_running():
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        return future.result()
+    return loop.run_until_complete(coroutine)
 
 
 async def get_bot():
@@ -100,5 +261,9 @@ async def get_bot():
 
 
 def run_polling():
-    app = _build_application()
+    app = _build_application(
+        vote_flush_interval=VOTE_QUEUE_FLUSH_INTERVAL_SECONDS,
+        concurrent_updates=POLLING_CONCURRENT_UPDATES,
+    )
+    app.post_stop = _flush_vote_queue
     app.run_polling()
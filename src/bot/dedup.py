@@ -0,0 +1,32 @@
+"""Drop Telegram updates that were already processed (webhook redeliveries)."""
+
+from collections import OrderedDict
+import threading
+
+from ..constants import UPDATE_DEDUP_MAX_SIZE
+
+
+class UpdateDeduplicator:
+    def __init__(self, max_size=UPDATE_DEDUP_MAX_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._seen = OrderedDict()
+
+    def mark_seen(self, update_id):
+        # True the first time an update_id is seen; False for a redelivery.
+        if update_id is None:
+            return True
+        with self._lock:
+            if update_id in self._seen:
+                self._seen.move_to_end(update_id)
+                return False
+            self._seen[update_id] = True
+            while len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+        return True
+
+    def forget(self, update_id):
+        if update_id is None:
+            return
+        with self._lock:
+            self._seen.pop(update_id, None)
@@ -0,0 +1,62 @@
+"""Hand webhook updates to a worker so the webhook can be acknowledged immediately."""
+
+import json
+import logging
+import queue
+import threading
+
+
+DEFERRED_UPDATE_KEY = "deferred_update"
+
+logger = logging.getLogger(__name__)
+
+
+def is_valid_update(update_payload):
+    return isinstance(update_payload, dict) and isinstance(update_payload.get("update_id"), int)
+
+
+class LambdaUpdateQueue:
+    def __init__(self, lambda_client, function_name):
+        self.lambda_client = lambda_client
+        self.function_name = function_name
+
+    def enqueue(self, update_payload):
+        # An "Event" invocation returns once Lambda has queued it, before it runs.
+        self.lambda_client.invoke(
+            FunctionName=self.function_name,
+            InvocationType="Event",
+            Payload=json.dumps({DEFERRED_UPDATE_KEY: update_payload}).encode("utf-8"),
+        )
+
+    def join(self):
+        # Lambda owns the queued invocations; there is nothing to wait for here.
+        pass
+
+
+# In-process stand-in for the Lambda worker, used locally.
+class LocalUpdateQueue:
+    def __init__(self, process_update):
+        self.process_update = process_update
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, update_payload):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+        self._queue.put(update_payload)
+
+    def join(self):
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            update_payload = self._queue.get()
+            try:
+                self.process_update(update_payload)
+            except Exception:
+                logger.exception("Deferred update %s failed.", update_payload.get("update_id"))
+            finally:
+                self._queue.task_done()
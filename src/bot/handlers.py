@@ -9,10 +9,12 @@ from ..common.util import (
     parse_time_range,
 )
 from ..config import get_broadcast_chat_id, set_broadcast_chat_id
-from ..sheets.client import SheetsRetryableError
+from ..constants import ADMIN_UNKNOWN_REFRESH_INTERVAL_SECONDS
+from ..sheets.common import SheetsError
 
 
 BOT_DATA_SHEETS_SERVICE_KEY = "sheets_service"
+BOT_DATA_VOTE_QUEUE_KEY = "vote_queue"
 YES_OPTION_ID = 0
 
 
@@ -37,13 +39,13 @@ async def handle_register(update, context):
     )
 
     try:
-        sheets_service.append_poll_metadata(
+        await sheets_service.append_poll_metadata(
             poll_id=poll_message.poll.id,
             poll_type="register",
             chat_id=target_chat_id,
             message_id=poll_message.message_id,
         )
-    except SheetsRetryableError:
+    except SheetsError:
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text="Google Sheets is unavailable. Please try again later.",
@@ -79,8 +81,8 @@ async def handle_deregister(update, context):
 
     sheets_service = _context_data(context)
     try:
-        removed = sheets_service.remove_member(handle)
-    except SheetsRetryableError:
+        removed = await sheets_service.remove_member(handle)
+    except SheetsError:
         await context.bot.send_message(
             chat_id=chat_id,
             text="Google Sheets is unavailable. Please try again later.",
@@ -118,8 +120,8 @@ async def handle_add_training(update, context):
 
     sheets_service = _context_data(context)
     try:
-        sheets_service.add_training(training_date, normalized_timing, description)
-    except SheetsRetryableError:
+        await sheets_service.add_training(training_date, normalized_timing, description)
+    except SheetsError:
         await context.bot.send_message(
             chat_id=chat_id,
             text="Google Sheets is unavailable. Please try again later.",
@@ -155,8 +157,8 @@ async def handle_cancel_training(update, context):
 
     sheets_service = _context_data(context)
     try:
-        deleted = sheets_service.cancel_training(training_date)
-    except SheetsRetryableError:
+        deleted = await sheets_service.cancel_training(training_date)
+    except SheetsError:
         await context.bot.send_message(
             chat_id=chat_id,
             text="Google Sheets is unavailable. Please try again later.",
@@ -176,8 +178,8 @@ async def handle_poll_answer(update, context):
 
     sheets_service = _context_data(context)
     try:
-        poll_meta = sheets_service.get_poll_metadata(poll_answer.poll_id) or {}
-    except SheetsRetryableError:
+        poll_meta = await sheets_service.get_poll_metadata(poll_answer.poll_id) or {}
+    except SheetsError:
         return
 
     if poll_meta.get("poll_type") == "register":
@@ -187,7 +189,7 @@ async def handle_poll_answer(update, context):
     if poll_meta.get("poll_type") == "training":
         try:
             await _apply_training_poll(poll_answer, poll_meta, context)
-        except SheetsRetryableError:
+        except SheetsError:
             return
 
 
@@ -196,7 +198,7 @@ async def _apply_register_poll(poll_answer, poll_meta, context):
         return
 
     sheets_service = _context_data(context)
-    member_item = sheets_service.register_member(poll_answer.user)
+    member_item = await sheets_service.register_member(poll_answer.user)
 
     chat_id = poll_meta.get("chat_id")
     if chat_id:
@@ -212,8 +214,8 @@ async def _apply_training_poll(poll_answer, poll_meta, context):
         return
 
     status = 1 if YES_OPTION_ID in poll_answer.option_ids else 0
-    sheets_service = _context_data(context)
-    sheets_service.record_poll_answer(poll_answer.user, training_date, status)
+    vote_queue = context.application.bot_data[BOT_DATA_VOTE_QUEUE_KEY]
+    await vote_queue.add(poll_answer.user, training_date, status)
 
 
 async def handle_help(update, context):
@@ -230,7 +232,8 @@ async def handle_help(update, context):
             "/cancel_training <date>\n"
             "/poll - send polls for this week\n"
             "/repoll - send polls for newly added trainings this week\n"
-            "/chase - remind members for all polls this week\n\n"
+            "/chase - remind members for all polls this week\n"
+            "/refresh_admins - reload the Admins sheet\n\n"
             "Note: Polls and reminders are always sent to the broadcast chat.\n"
             "Run /register_chat in the broadcast channel first.\n\n"
             "Examples:\n"
@@ -298,7 +301,7 @@ async def handle_repoll(update, context):
             announce=True,
             only_missing=True,
         )
-    except SheetsRetryableError:
+    except SheetsError:
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text="Google Sheets is unavailable. Please try again later.",
@@ -325,7 +328,7 @@ async def handle_poll(update, context):
             announce=True,
             only_missing=False,
         )
-    except SheetsRetryableError:
+    except SheetsError:
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text="Google Sheets is unavailable. Please try again later.",
@@ -350,7 +353,7 @@ async def handle_chase(update, context):
             sheets_service=_context_data(context),
             chat_id=target_chat_id,
         )
-    except SheetsRetryableError:
+    except SheetsError:
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text="Google Sheets is unavailable. Please try again later.",
@@ -363,6 +366,35 @@ async def handle_chase(update, context):
         )
 
 
+async def handle_refresh_admins(update, context):
+    sheets_service = _context_data(context)
+    user = update.effective_user
+    username = user.username if user else None
+    admin_usernames = None
+    if username:
+        try:
+            if await sheets_service.is_admin(username):
+                admin_usernames = await sheets_service.refresh_admins()
+            else:
+                # Someone just added to the Admins sheet is not cached yet, but unknown
+                # callers only get a reload once per interval between them.
+                admin_usernames = await sheets_service.refresh_admins(
+                    min_age=ADMIN_UNKNOWN_REFRESH_INTERVAL_SECONDS
+                )
+        except SheetsError:
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text="Google Sheets is unavailable. Please try again later.",
+            )
+            return
+    if not await _ensure_admin(update, context):
+        return
+    await context.bot.send_message(
+        chat_id=update.effective_chat.id,
+        text=f"Admin list refreshed: {len(admin_usernames)} admin(s).",
+    )
+
+
 async def _get_broadcast_chat_id_or_warn(update, context):
     raw_value = get_broadcast_chat_id()
     if not raw_value:
@@ -393,8 +425,8 @@ async def _ensure_admin(update, context):
 
     sheets_service = _context_data(context)
     try:
-        is_admin = sheets_service.is_admin(username)
-    except SheetsRetryableError:
+        is_admin = await sheets_service.is_admin(username)
+    except SheetsError:
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text="Google Sheets is unavailable. Please try again later.",
@@ -0,0 +1,94 @@
+"""Outbound Telegram sends paced under the bot-wide and per-chat flood limits.
+
+Sends to one chat go out one at a time in call order; different chats proceed concurrently.
+The poll and reminder jobs only send to the broadcast chat, so for them this paces the sends
+and retries flood waits rather than overlapping anything.
+"""
+
+import asyncio
+from datetime import timedelta
+import logging
+
+from telegram.error import RetryAfter
+
+from ..constants import (
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_CHAT_MESSAGES_PER_MINUTE,
+    TELEGRAM_MESSAGES_PER_SECOND,
+    TELEGRAM_RETRY_AFTER_MAX_RETRIES,
+)
+from ..sheets.locks import LoopBound
+from ..sheets.rate_limit import TokenBucket
+
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundScheduler:
+    def __init__(
+        self,
+        messages_per_second=TELEGRAM_MESSAGES_PER_SECOND,
+        chat_messages_per_minute=TELEGRAM_CHAT_MESSAGES_PER_MINUTE,
+        chat_burst=TELEGRAM_CHAT_BURST,
+        max_retries=TELEGRAM_RETRY_AFTER_MAX_RETRIES,
+    ):
+        self.chat_messages_per_minute = chat_messages_per_minute
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global_bucket = TokenBucket(messages_per_second * 60, messages_per_second)
+        self._chat_buckets = {}
+        self._chat_locks = LoopBound(dict)
+
+    async def send(self, chat_id, send):
+        # `send` builds a fresh coroutine per attempt, so a flood-wait can be retried.
+        # The chat lock is held across retries so a later message never overtakes this one.
+        async with self._get_chat_lock(chat_id):
+            retries = 0
+            while True:
+                await self._acquire(chat_id)
+                try:
+                    return await send()
+                except RetryAfter as exc:
+                    if retries >= self.max_retries:
+                        raise
+                    retries += 1
+                    delay = _get_retry_after_seconds(exc)
+                    logger.warning(
+                        "Telegram flood control for chat %s; retrying in %.1fs.", chat_id, delay
+                    )
+                    await asyncio.sleep(delay)
+
+    async def send_message(self, bot, chat_id, **kwargs):
+        return await self.send(chat_id, lambda: bot.send_message(chat_id=chat_id, **kwargs))
+
+    async def send_poll(self, bot, chat_id, **kwargs):
+        return await self.send(chat_id, lambda: bot.send_poll(chat_id=chat_id, **kwargs))
+
+    def _get_chat_lock(self, chat_id):
+        chat_locks = self._chat_locks.get()
+        chat_lock = chat_locks.get(chat_id)
+        if chat_lock is None:
+            chat_lock = asyncio.Lock()
+            chat_locks[chat_id] = chat_lock
+        return chat_lock
+
+    async def _acquire(self, chat_id):
+        chat_bucket = self._chat_buckets.get(chat_id)
+        if chat_bucket is None:
+            chat_bucket = TokenBucket(self.chat_messages_per_minute, self.chat_burst)
+            self._chat_buckets[chat_id] = chat_bucket
+        # Both slots are reserved up front, so the wait is for whichever limit is further out.
+        wait = max(self._global_bucket.reserve(), chat_bucket.reserve())
+        if wait:
+            await asyncio.sleep(wait)
+
+
+def _get_retry_after_seconds(exc):
+    retry_after = exc.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+# Shared by every send in the process, so concurrent jobs stay under one set of limits.
+OUTBOUND_SCHEDULER = OutboundScheduler()
@@ -0,0 +1,81 @@
+"""Answer the webhook request with the update's last sendMessage call."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+
+from telegram.ext import ExtBot
+
+
+# Telegram executes one Bot API method given in the webhook response body.
+WEBHOOK_REPLY_METHODS = frozenset({"sendMessage"})
+
+_WEBHOOK_REPLY = ContextVar("webhook_reply", default=None)
+
+
+class WebhookReply:
+    def __init__(self):
+        self.endpoint = None
+        self.data = None
+
+    def hold(self, endpoint, data):
+        self.endpoint = endpoint
+        self.data = data
+
+    def release(self):
+        endpoint, data = self.endpoint, self.data
+        self.endpoint = None
+        self.data = None
+        return endpoint, data
+
+    def to_response_body(self):
+        if self.endpoint is None:
+            return None
+        return {"method": self.endpoint, **self.data}
+
+
+@contextmanager
+def capture_webhook_reply():
+    reply = WebhookReply()
+    token = _WEBHOOK_REPLY.set(reply)
+    try:
+        yield reply
+    finally:
+        _WEBHOOK_REPLY.reset(token)
+
+
+class WebhookReplyBot(ExtBot):
+    async def _do_post(self, endpoint, data, **kwargs):
+        reply = _WEBHOOK_REPLY.get()
+        if reply is None:
+            return await super()._do_post(endpoint, data, **kwargs)
+        # Any later call means the held message was not the last one; send it first to keep order.
+        await self.send_held_reply(reply)
+        placeholder = _build_placeholder_message(endpoint, data)
+        if placeholder is None:
+            return await super()._do_post(endpoint, data, **kwargs)
+        reply.hold(endpoint, data)
+        return placeholder
+
+    async def send_held_reply(self, reply):
+        endpoint, data = reply.release()
+        if endpoint is not None:
+            await super()._do_post(endpoint, data)
+
+
+def _build_placeholder_message(endpoint, data):
+    if endpoint not in WEBHOOK_REPLY_METHODS:
+        return None
+    if not all(isinstance(value, (str, int, float, bool)) for value in data.values()):
+        return None
+    try:
+        chat_id = int(data["chat_id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    # Handlers never read the sent Message back, so a minimal stand-in is enough.
+    return {
+        "message_id": 0,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "text": data.get("text", ""),
+    }
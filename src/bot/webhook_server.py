@@ -0,0 +1,213 @@
+"""Long-running asyncio webhook server that keeps the application and its caches warm."""
+
+import asyncio
+import hmac
+import json
+import logging
+import signal
+
+from ..config import (
+    get_webhook_secret_token,
+    get_webhook_server_host,
+    get_webhook_server_max_concurrency,
+    get_webhook_server_path,
+    get_webhook_server_port,
+)
+from ..constants import WEBHOOK_SERVER_KEEP_ALIVE_SECONDS, WEBHOOK_SERVER_MAX_BODY_BYTES
+from .application import get_bot, process_update_async, shutdown_application
+from .deferred import is_valid_update
+
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PATH = "/healthz"
+SECRET_TOKEN_HEADER = "x-telegram-bot-api-secret-token"
+STATUS_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class BadRequest(Exception):
+    def __init__(self, status):
+        super().__init__(STATUS_REASONS[status])
+        self.status = status
+
+
+class WebhookServer:
+    def __init__(
+        self,
+        process_update,
+        path,
+        max_concurrency,
+        secret_token="",
+        keep_alive=WEBHOOK_SERVER_KEEP_ALIVE_SECONDS,
+        max_body_bytes=WEBHOOK_SERVER_MAX_BODY_BYTES,
+    ):
+        self.process_update = process_update
+        self.path = path
+        self.secret_token = secret_token
+        self.keep_alive = keep_alive
+        self.max_body_bytes = max_body_bytes
+        # Telegram opens several connections at once; this bounds how many updates run together.
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._connections = set()
+        self._idle = set()
+        self._closing = False
+
+    async def handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while not self._closing:
+                self._idle.add(writer)
+                try:
+                    request = await asyncio.wait_for(
+                        _read_request(reader, self.max_body_bytes), self.keep_alive
+                    )
+                except BadRequest as exc:
+                    _write_response(writer, exc.status, keep_alive=False)
+                    await writer.drain()
+                    return
+                finally:
+                    self._idle.discard(writer)
+                if request is None:
+                    return
+                status = await self.handle_request(request)
+                keep_alive = (
+                    not self._closing
+                    and request["headers"].get("connection", "").lower() != "close"
+                )
+                _write_response(writer, status, keep_alive=keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # ValueError: a request or header line longer than the stream limit.
+            return
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def close(self):
+        # Idle keep-alive connections are dropped; requests already being processed finish.
+        self._closing = True
+        for writer in list(self._idle):
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+
+    async def handle_request(self, request):
+        path = request["target"].split("?", 1)[0]
+        if path == HEALTH_PATH and request["method"] == "GET":
+            return 200
+        if path != self.path:
+            return 404
+        if request["method"] != "POST":
+            return 405
+        if self.secret_token and not hmac.compare_digest(
+            request["headers"].get(SECRET_TOKEN_HEADER, ""), self.secret_token
+        ):
+            return 403
+        try:
+            update = json.loads(request["body"] or b"")
+        except ValueError:
+            return 400
+        if not is_valid_update(update):
+            return 400
+
+        # Answer only after processing, so a failed update is redelivered by Telegram.
+        # Failed poll answers raise too (see application._dispatch_update); commands do not.
+        async with self._slots:
+            try:
+                await self.process_update(update)
+            except Exception:
+                logger.exception("Failed to process update %s.", update.get("update_id"))
+                return 500
+        return 200
+
+
+async def _read_request(reader, max_body_bytes):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    parts = request_line.decode("latin-1").strip().split()
+    if len(parts) != 3:
+        raise BadRequest(400)
+    method, target, _ = parts
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(line, None)
+        if line in (b"\r\n", b"\n"):
+            break
+        name, separator, value = line.decode("latin-1").partition(":")
+        if not separator:
+            raise BadRequest(400)
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise BadRequest(411)
+    try:
+        content_length = int(headers.get("content-length", "0"))
+    except ValueError as exc:
+        raise BadRequest(400) from exc
+    if content_length < 0:
+        raise BadRequest(400)
+    if content_length > max_body_bytes:
+        raise BadRequest(413)
+    body = await reader.readexactly(content_length) if content_length else b""
+    return {"method": method.upper(), "target": target, "headers": headers, "body": body}
+
+
+def _write_response(writer, status, keep_alive=True):
+    body = STATUS_REASONS[status].encode("ascii")
+    writer.write(
+        (
+            f"HTTP/1.1 {status} {STATUS_REASONS[status]}\r\n"
+            "Content-Type: text/plain\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        ).encode("ascii")
+        + body
+    )
+
+
+async def serve():
+    host = get_webhook_server_host()
+    port = get_webhook_server_port()
+    webhook_server = WebhookServer(
+        process_update_async,
+        get_webhook_server_path(),
+        get_webhook_server_max_concurrency(),
+        secret_token=get_webhook_secret_token(),
+    )
+    # Initialize the bot (getMe) before the first update arrives.
+    await get_bot()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop_event.set)
+
+    server = await asyncio.start_server(webhook_server.handle_connection, host, port)
+    logger.info("Webhook server listening on %s:%s%s", host, port, webhook_server.path)
+    try:
+        await stop_event.wait()
+    finally:
+        server.close()
+        await webhook_server.close()
+        await server.wait_closed()
+        await shutdown_application()
+
+
+def run_webhook_server():
+    asyncio.run(serve())
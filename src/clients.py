@@ -1,11 +1,55 @@
-"""Shared external clients."""
+"""Shared external clients, created on first use so cold starts only import what they touch."""
 
-import boto3
-from telegram.ext import Application
+from .constants import TELEGRAM_CONNECTION_POOL_SIZE
 
+_SSM_CLIENT = None
+_LAMBDA_CLIENT = None
+_DYNAMODB_CLIENT = None
 
-SSM_CLIENT = boto3.client("ssm")
 
+def get_ssm_client():
+    global _SSM_CLIENT
+    if _SSM_CLIENT is None:
+        import boto3
 
-def build_telegram_application(token):
-    return Application.builder().token(token).build()
+        _SSM_CLIENT = boto3.client("ssm")
+    return _SSM_CLIENT
+
+
+def get_lambda_client():
+    global _LAMBDA_CLIENT
+    if _LAMBDA_CLIENT is None:
+        import boto3
+
+        _LAMBDA_CLIENT = boto3.client("lambda")
+    return _LAMBDA_CLIENT
+
+
+def get_dynamodb_client():
+    global _DYNAMODB_CLIENT
+    if _DYNAMODB_CLIENT is None:
+        import boto3
+
+        _DYNAMODB_CLIENT = boto3.client("dynamodb")
+    return _DYNAMODB_CLIENT
+
+
+def build_telegram_application(token, concurrent_updates=False):
+    from telegram.ext import Application
+    from telegram.request import HTTPXRequest
+
+    from .bot.webhook_reply import WebhookReplyBot
+
+    # A custom bot skips the builder's request setup; mirror its pools so concurrent sends
+    # do not queue on ExtBot's single default connection.
+    bot = WebhookReplyBot(
+        token,
+        request=HTTPXRequest(connection_pool_size=TELEGRAM_CONNECTION_POOL_SIZE),
+        get_updates_request=HTTPXRequest(connection_pool_size=1),
+    )
+    return (
+        Application.builder()
+        .bot(bot)
+        .concurrent_updates(concurrent_updates)
+        .build()
+    )
@@ -1,11 +1,35 @@
 import json
 import os
+import threading
+import time
 
 from dotenv import load_dotenv
 
-from .clients import SSM_CLIENT
+from .clients import get_ssm_client
+from .constants import (
+    ADMIN_CACHE_TTL_SECONDS,
+    SSM_PARAMETER_CACHE_TTL_SECONDS,
+    WEBHOOK_PROCESSING_MODES,
+    WEBHOOK_SERVER_HOST,
+    WEBHOOK_SERVER_MAX_CONCURRENCY,
+    WEBHOOK_SERVER_PATH,
+    WEBHOOK_SERVER_PORT,
+)
+
+SSM_PARAMETER_ENV_NAMES = (
+    "TELEGRAM_BOT_TOKEN_PARAM",
+    "GOOGLE_SHEET_ID_PARAM",
+    "GOOGLE_SERVICE_ACCOUNT_PARAM",
+    "BROADCAST_CHAT_ID_PARAM",
+    "WEBHOOK_SECRET_TOKEN_PARAM",
+)
+# GetParameters accepts at most this many names per call.
+SSM_GET_PARAMETERS_MAX_NAMES = 10
 
 _ENV_LOADED = False
+_SSM_PARAMETERS = {}
+_SSM_PARAMETERS_LOADED_AT = None
+_SSM_PARAMETERS_LOCK = threading.Lock()
 
 
 def _ensure_env_loaded():
@@ -20,8 +44,38 @@ def _ensure_env_loaded():
 
 
 def _get_ssm_parameter(name):
-    response = SSM_CLIENT.get_parameter(Name=name, WithDecryption=True)
-    return response.get("Parameter", {}).get("Value", "")
+    with _SSM_PARAMETERS_LOCK:
+        if name not in _SSM_PARAMETERS or _ssm_parameters_expired():
+            _load_ssm_parameters(name)
+        return _SSM_PARAMETERS.get(name, "")
+
+
+def _ssm_parameters_expired():
+    if _SSM_PARAMETERS_LOADED_AT is None:
+        return True
+    return time.monotonic() - _SSM_PARAMETERS_LOADED_AT >= SSM_PARAMETER_CACHE_TTL_SECONDS
+
+
+def _load_ssm_parameters(requested_name):
+    global _SSM_PARAMETERS, _SSM_PARAMETERS_LOADED_AT
+    # Resolve every configured *_PARAM in one round trip so later lookups are free.
+    names = {os.getenv(env_name, "") for env_name in SSM_PARAMETER_ENV_NAMES}
+    names.add(requested_name)
+    names.discard("")
+    names = sorted(names)
+
+    values = {}
+    for start in range(0, len(names), SSM_GET_PARAMETERS_MAX_NAMES):
+        response = get_ssm_client().get_parameters(
+            Names=names[start : start + SSM_GET_PARAMETERS_MAX_NAMES],
+            WithDecryption=True,
+        )
+        for parameter in response.get("Parameters", []):
+            values[parameter["Name"]] = parameter.get("Value", "")
+
+    # Names reported under InvalidParameters resolve to "", like an unset env value.
+    _SSM_PARAMETERS = {name: values.get(name, "") for name in names}
+    _SSM_PARAMETERS_LOADED_AT = time.monotonic()
 
 
 def _resolve_parameter(env_value_name, env_parameter_name):
@@ -76,6 +130,79 @@ def load_service_account_info():
         return json.load(file_handle)
 
 
+def get_admin_cache_ttl_seconds():
+    _ensure_env_loaded()
+    value = os.getenv("ADMIN_CACHE_TTL_SECONDS", "")
+    if not value:
+        return ADMIN_CACHE_TTL_SECONDS
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise ValueError("ADMIN_CACHE_TTL_SECONDS must be a number of seconds.") from exc
+
+
+def get_webhook_processing_mode():
+    _ensure_env_loaded()
+    value = os.getenv("WEBHOOK_PROCESSING_MODE", "inline").strip().lower()
+    if value not in WEBHOOK_PROCESSING_MODES:
+        raise ValueError(
+            f"WEBHOOK_PROCESSING_MODE must be one of: {', '.join(WEBHOOK_PROCESSING_MODES)}."
+        )
+    return value
+
+
+def get_webhook_reply_enabled():
+    _ensure_env_loaded()
+    return os.getenv("WEBHOOK_REPLY_ENABLED", "").strip().lower() in ("1", "true", "yes")
+
+
+def get_webhook_server_host():
+    _ensure_env_loaded()
+    return os.getenv("WEBHOOK_SERVER_HOST", WEBHOOK_SERVER_HOST)
+
+
+def get_webhook_server_port():
+    return _get_positive_int("WEBHOOK_SERVER_PORT", WEBHOOK_SERVER_PORT)
+
+
+def get_webhook_server_path():
+    _ensure_env_loaded()
+    value = os.getenv("WEBHOOK_SERVER_PATH", WEBHOOK_SERVER_PATH).strip()
+    return value if value.startswith("/") else f"/{value}"
+
+
+def get_webhook_server_max_concurrency():
+    return _get_positive_int("WEBHOOK_SERVER_MAX_CONCURRENCY", WEBHOOK_SERVER_MAX_CONCURRENCY)
+
+
+def get_webhook_secret_token():
+    return _resolve_parameter("WEBHOOK_SECRET_TOKEN", "WEBHOOK_SECRET_TOKEN_PARAM")
+
+
+def _get_positive_int(env_name, default):
+    _ensure_env_loaded()
+    value = os.getenv(env_name, "")
+    if not value:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError as exc:
+        raise ValueError(f"{env_name} must be a positive integer.") from exc
+    if parsed < 1:
+        raise ValueError(f"{env_name} must be a positive integer.")
+    return parsed
+
+
+def get_layout_lease_table_name():
+    # Unset means one process owns the sheet and an in-memory lease is enough.
+    _ensure_env_loaded()
+    return os.getenv("LAYOUT_LEASE_TABLE", "").strip()
+
+
+def get_lambda_function_name():
+    return os.getenv("AWS_LAMBDA_FUNCTION_NAME", "")
+
+
 def get_broadcast_chat_id():
     return _resolve_parameter("BROADCAST_CHAT_ID", "BROADCAST_CHAT_ID_PARAM")
 
@@ -85,9 +212,11 @@ def set_broadcast_chat_id(chat_id):
     param_name = os.getenv("BROADCAST_CHAT_ID_PARAM", "")
     if not param_name:
         raise ValueError("BROADCAST_CHAT_ID_PARAM is required to store the chat id.")
-    SSM_CLIENT.put_parameter(
+    get_ssm_client().put_parameter(
         Name=param_name,
         Value=str(chat_id),
         Type="String",
         Overwrite=True,
     )
+    with _SSM_PARAMETERS_LOCK:
+        _SSM_PARAMETERS[param_name] = str(chat_id)
@@ -12,3 +12,60 @@ DATE_COLUMN_WIDTH = 140
 TOTAL_COLUMN_WIDTH = 120
 MEMBER_COLUMN_WIDTHS = [200, 160]
 CELL_PADDING = 6
+
+# Sheets API per-minute quotas for one service account; the client paces itself below them.
+SHEETS_READ_REQUESTS_PER_MINUTE = 60
+SHEETS_WRITE_REQUESTS_PER_MINUTE = 60
+SHEETS_RATE_LIMIT_BURST = 10
+SHEETS_RATE_LIMIT_MAX_WAIT_SECONDS = 10.0
+
+# Longest a warm container keeps its Attendance grid while the sheet version stamp is
+# unchanged. Hand edits to headers or member rows are caught on every read (the member
+# columns are compared); this bounds how long hand-edited vote cells go unseen.
+ATTENDANCE_GRID_TTL_SECONDS = 600.0
+
+# Admin usernames are cached per container; /refresh_admins forces a reload. Callers not in
+# the cached list can force one at most this often, so non-admins cannot flood Sheets reads.
+ADMIN_CACHE_TTL_SECONDS = 300.0
+ADMIN_UNKNOWN_REFRESH_INTERVAL_SECONDS = 30.0
+
+# Poll answers are coalesced per user and written in batches of this size or after this delay.
+VOTE_QUEUE_MAX_BATCH_SIZE = 50
+VOTE_QUEUE_FLUSH_INTERVAL_SECONDS = 2.0
+# A batch that keeps failing with retryable errors is dropped after this many flushes.
+VOTE_QUEUE_MAX_FLUSH_ATTEMPTS = 5
+
+# Telegram flood limits: ~30 messages/s per bot and ~20 messages/min in one group.
+# A short per-chat burst lets a week of polls go out together; RetryAfter covers overshoot.
+TELEGRAM_MESSAGES_PER_SECOND = 30
+TELEGRAM_CHAT_MESSAGES_PER_MINUTE = 20
+TELEGRAM_CHAT_BURST = 10
+TELEGRAM_RETRY_AFTER_MAX_RETRIES = 3
+# Bot API connections, matching python-telegram-bot's ApplicationBuilder default.
+TELEGRAM_CONNECTION_POOL_SIZE = 256
+
+# SSM parameters are resolved in one batch per container and re-read after this long.
+SSM_PARAMETER_CACHE_TTL_SECONDS = 300.0
+
+WEBHOOK_PROCESSING_MODES = ("inline", "deferred")
+
+# Updates handled at once by polling and the self-hosted server; SheetsService serializes
+# layout changes and roster appends and lets cell writes interleave.
+POLLING_CONCURRENT_UPDATES = 8
+
+# Layout and roster changes hold a lease shared by every instance. It is renewed while held,
+# so the TTL only matters for a holder that dies mid-change; waiting longer than the wait
+# limit fails the update as retryable.
+LAYOUT_LEASE_TTL_SECONDS = 30.0
+LAYOUT_LEASE_WAIT_SECONDS = 10.0
+
+# Self-hosted webhook server (main.py --serve).
+WEBHOOK_SERVER_HOST = "0.0.0.0"
+WEBHOOK_SERVER_PORT = 8080
+WEBHOOK_SERVER_PATH = "/webhook"
+WEBHOOK_SERVER_MAX_CONCURRENCY = 8
+WEBHOOK_SERVER_MAX_BODY_BYTES = 1024 * 1024
+WEBHOOK_SERVER_KEEP_ALIVE_SECONDS = 75.0
+
+# Recently processed Telegram update_ids remembered per container to drop webhook retries.
+UPDATE_DEDUP_MAX_SIZE = 1024
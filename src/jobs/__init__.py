@@ -1,9 +1,11 @@
 from ..config import (
     get_google_sheet_id,
     get_google_sheet_name,
+    get_layout_lease_table_name,
     load_service_account_info,
 )
-from ..sheets.client import GoogleSheetsClient
+from ..sheets.async_client import AsyncGoogleSheetsClient
+from ..sheets.lease import create_layout_lease
 from ..sheets.service import SheetsService
 
 
@@ -14,10 +16,11 @@ def get_sheets_service():
     global _SHEETS_SERVICE
     if _SHEETS_SERVICE is None:
         sheets_info = load_service_account_info()
-        sheets_client = GoogleSheetsClient.create_from_service_account_info(sheets_info)
+        sheets_client = AsyncGoogleSheetsClient.create_from_service_account_info(sheets_info)
         _SHEETS_SERVICE = SheetsService(
             sheets_client,
             get_google_sheet_id(),
             get_google_sheet_name(),
+            layout_lease=create_layout_lease(get_layout_lease_table_name()),
         )
     return _SHEETS_SERVICE
@@ -3,15 +3,27 @@
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
+from ..bot.outbound import OUTBOUND_SCHEDULER
 from ..common.util import (
     SINGAPORE_TZ,
     build_greeting_message,
     build_message_link,
     build_training_question,
 )
+from ..sheets.week import WeekContext
 from .reminder import send_reminder_for_training
 
 
+async def load_week_context(sheets_service):
+    tz = ZoneInfo(SINGAPORE_TZ)
+    today = datetime.now(tz).date()
+    start_date = today.isoformat()
+    end_date = (today + timedelta(days=6)).isoformat()
+    if not (sheets_service and sheets_service.spreadsheet_id):
+        return WeekContext(start_date, end_date)
+    return await sheets_service.load_week_context(start_date, end_date)
+
+
 async def send_training_polls_for_week(
     bot,
     sheets_service,
@@ -19,85 +31,50 @@ async def send_training_polls_for_week(
     announce=False,
     only_missing=False,
 ):
-    timezone = SINGAPORE_TZ
-    tz = ZoneInfo(timezone)
-    today = datetime.now(tz).date()
-    end_date = today + timedelta(days=6)
-
-    trainings = []
-    if sheets_service and sheets_service.spreadsheet_id:
-        trainings = sheets_service.get_week_trainings(
-            today.isoformat(),
-            end_date.isoformat(),
-        )
+    week_context = await load_week_context(sheets_service)
+    trainings = week_context.trainings
 
     if announce:
-        await bot.send_message(chat_id=chat_id, text=build_greeting_message(trainings))
-
-    if sheets_service and sheets_service.spreadsheet_id:
-        sheets_service.ensure_attendance_columns()
-
-    sent_count = 0
-    for training in trainings:
-        if only_missing and sheets_service and sheets_service.spreadsheet_id:
-            existing_poll = sheets_service.get_latest_poll_for_training(
-                training.get("date", "")
-            )
-            if existing_poll:
-                continue
-
-        poll_message = await bot.send_poll(
-            chat_id=chat_id,
+        await OUTBOUND_SCHEDULER.send_message(bot, chat_id, text=build_greeting_message(trainings))
+
+    trainings_to_poll = [
+        training
+        for training in trainings
+        if not (only_missing and week_context.get_latest_poll(training["date"]))
+    ]
+    # Sent in date order (one chat, so no gain from overlapping them). Each poll's row is
+    # written as soon as it is sent, so an early vote finds it.
+    poll_entries = []
+    for training in trainings_to_poll:
+        message = await OUTBOUND_SCHEDULER.send_poll(
+            bot,
+            chat_id,
             question=build_training_question(training),
             options=["Yes", "No"],
             is_anonymous=False,
         )
-        sent_count += 1
-        message_link = build_message_link(chat_id=chat_id, message_id=poll_message.message_id)
-
+        poll_entry = {
+            "poll_id": message.poll.id,
+            "poll_type": "training",
+            "chat_id": chat_id,
+            "message_id": message.message_id,
+            "training_date": training.get("date"),
+            "message_link": build_message_link(chat_id=chat_id, message_id=message.message_id),
+        }
         if sheets_service and sheets_service.spreadsheet_id:
-            sheets_service.append_poll_metadata(
-                poll_id=poll_message.poll.id,
-                poll_type="training",
-                chat_id=chat_id,
-                message_id=poll_message.message_id,
-                training_date=training.get("date"),
-                message_link=message_link,
-            )
+            await sheets_service.append_poll_metadata_batch([poll_entry])
+        poll_entries.append(poll_entry)
 
-    return sent_count
+    return len(poll_entries)
 
 
 async def send_chase_for_week(bot, sheets_service, chat_id):
-    timezone = SINGAPORE_TZ
-    tz = ZoneInfo(timezone)
-    today = datetime.now(tz).date()
-    end_date = today + timedelta(days=6)
-
-    trainings = []
-    if sheets_service and sheets_service.spreadsheet_id:
-        trainings = sheets_service.get_week_trainings(
-            today.isoformat(),
-            end_date.isoformat(),
-        )
-
-    sent_count = 0
-    for training in trainings:
-        training_date = training.get("date", "")
-        if not training_date:
-            continue
-
-        existing_poll = sheets_service.get_latest_poll_for_training(training_date)
-        if not existing_poll:
-            continue
-
-        sent = await send_reminder_for_training(
-            bot,
-            sheets_service,
-            training_date,
-            chat_id,
-        )
-        if sent:
-            sent_count += 1
-
-    return sent_count
+    week_context = await load_week_context(sheets_service)
+    sent = 0
+    for training in week_context.trainings:
+        # One training at a time, so each reminder is followed by its own mentions.
+        if week_context.get_latest_poll(training["date"]) and await send_reminder_for_training(
+            bot, week_context, training["date"], chat_id
+        ):
+            sent += 1
+    return sent
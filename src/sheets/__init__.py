@@ -1,4 +1,16 @@
-from .client import GoogleSheetsClient
-from .service import SheetsService
+import importlib
 
-__all__ = ["GoogleSheetsClient", "SheetsService"]
+_EXPORTS = {
+    "AsyncGoogleSheetsClient": ".async_client",
+    "SheetsService": ".service",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    # Resolve on first access so importing one submodule does not load every client's dependencies.
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
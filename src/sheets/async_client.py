@@ -0,0 +1,272 @@
+"""Asyncio Google Sheets client on a pooled httpx transport."""
+
+import asyncio
+import logging
+from urllib.parse import quote
+
+import httpx
+from google.auth.exceptions import TransportError
+from google.oauth2 import service_account
+
+from ..constants import SHEETS_SCOPE
+from .common import (
+    REJECTED_MESSAGE,
+    UNAVAILABLE_MESSAGE,
+    WORKSHEET_PROPERTIES_FIELDS,
+    SheetsError,
+    SheetsRetryableError,
+    changes_worksheet_layout,
+    index_worksheet_properties,
+)
+from .locks import LoopBound
+from .rate_limit import READ, SHEETS_RATE_LIMITER, WRITE, RateLimitExceeded
+from .retry import (
+    SHEETS_CIRCUIT_BREAKER,
+    RetryPolicy,
+    get_retry_after,
+    get_status_code,
+    is_retryable_error,
+)
+
+
+SHEETS_API_BASE_URL = "https://sheets.googleapis.com/v4/spreadsheets/"
+HTTP_TIMEOUT_SECONDS = 10.0
+HTTP_POOL_LIMITS = httpx.Limits(
+    max_connections=20,
+    max_keepalive_connections=10,
+    keepalive_expiry=60.0,
+)
+TRANSPORT_ERRORS = (OSError, httpx.TransportError, TransportError)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGoogleSheetsClient:
+    def __init__(
+        self,
+        credentials,
+        http_client=None,
+        retry_policy=None,
+        circuit_breaker=None,
+        rate_limiter=None,
+    ):
+        self.credentials = credentials
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or SHEETS_CIRCUIT_BREAKER
+        self.rate_limiter = rate_limiter or SHEETS_RATE_LIMITER
+        self._http_client = http_client
+        self._owns_http_client = http_client is None
+        self._loop_state = LoopBound(self._create_loop_state)
+        # spreadsheet_id -> {title: sheet properties}, kept for the container lifetime.
+        self._worksheet_properties = {}
+
+    @classmethod
+    def create_from_service_account_file(cls, service_account_file):
+        credentials = service_account.Credentials.from_service_account_file(
+            service_account_file,
+            scopes=[SHEETS_SCOPE],
+        )
+        return cls(credentials)
+
+    @classmethod
+    def create_from_service_account_info(cls, service_account_info):
+        credentials = service_account.Credentials.from_service_account_info(
+            service_account_info,
+            scopes=[SHEETS_SCOPE],
+        )
+        return cls(credentials)
+
+    async def aclose(self):
+        loop_state = self._loop_state.value
+        if loop_state is not None and self._owns_http_client:
+            await loop_state["http_client"].aclose()
+        self._loop_state.clear()
+
+    def _create_loop_state(self):
+        # Pooled connections belong to one event loop too; a caller-supplied client is kept.
+        http_client = self._http_client
+        if self._owns_http_client:
+            http_client = httpx.AsyncClient(
+                timeout=HTTP_TIMEOUT_SECONDS,
+                limits=HTTP_POOL_LIMITS,
+            )
+        return {"http_client": http_client, "credentials_lock": asyncio.Lock()}
+
+    async def _get_auth_headers(self):
+        if not self.credentials.valid:
+            async with self._loop_state.get()["credentials_lock"]:
+                if not self.credentials.valid:
+                    # Pulls in requests; only paid once a token is actually needed.
+                    from google.auth.transport.requests import Request as GoogleAuthRequest
+
+                    await asyncio.to_thread(self.credentials.refresh, GoogleAuthRequest())
+        headers = {}
+        self.credentials.apply(headers)
+        return headers
+
+    async def _send(self, method, path, params=None, body=None):
+        http_client = self._loop_state.get()["http_client"]
+        headers = await self._get_auth_headers()
+        # Paths like "<id>:batchUpdate" would parse as a URL scheme, so never join relatively.
+        response = await http_client.request(
+            method,
+            f"{SHEETS_API_BASE_URL}{path}",
+            params=params,
+            json=body,
+            headers=headers,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _execute_with_retry(self, method, path, params=None, body=None):
+        if not self.circuit_breaker.allow_request():
+            raise SheetsRetryableError(UNAVAILABLE_MESSAGE)
+
+        request_kind = READ if method == "GET" else WRITE
+        total_delay = 0.0
+        attempt = 0
+        while True:
+            try:
+                await self.rate_limiter.acquire_async(request_kind)
+            except RateLimitExceeded as exc:
+                raise SheetsRetryableError(UNAVAILABLE_MESSAGE) from exc
+            try:
+                response = await self._send(method, path, params=params, body=body)
+            except Exception as exc:
+                if not is_retryable_error(exc, TRANSPORT_ERRORS):
+                    # The API answered; a bad request will not improve with retries.
+                    self.circuit_breaker.record_success()
+                    status = get_status_code(exc)
+                    if status is None:
+                        raise
+                    logger.warning("Sheets API rejected %s %s with HTTP %s.", method, path, status)
+                    raise SheetsError(REJECTED_MESSAGE.format(status=status)) from exc
+                self.circuit_breaker.record_failure()
+                delay = self.retry_policy.get_delay(attempt, total_delay, get_retry_after(exc))
+                if delay is None or not self.circuit_breaker.allow_request():
+                    raise SheetsRetryableError(UNAVAILABLE_MESSAGE) from exc
+                await asyncio.sleep(delay)
+                total_delay += delay
+                attempt += 1
+                continue
+
+            self.circuit_breaker.record_success()
+            return response
+
+    async def get_spreadsheet(self, spreadsheet_id, fields=None):
+        params = {"fields": fields} if fields else None
+        return await self._execute_with_retry("GET", _spreadsheet_path(spreadsheet_id), params=params)
+
+    async def get_worksheet_properties_by_title(self, spreadsheet_id, sheet_name):
+        properties_by_title = self._worksheet_properties.get(spreadsheet_id)
+        if properties_by_title is None:
+            spreadsheet = await self.get_spreadsheet(
+                spreadsheet_id, fields=WORKSHEET_PROPERTIES_FIELDS
+            )
+            properties_by_title = self.store_worksheet_properties(spreadsheet_id, spreadsheet)
+        return properties_by_title.get(sheet_name)
+
+    def store_worksheet_properties(self, spreadsheet_id, spreadsheet):
+        properties_by_title = index_worksheet_properties(spreadsheet)
+        self._worksheet_properties[spreadsheet_id] = properties_by_title
+        return properties_by_title
+
+    def invalidate_worksheet_properties(self, spreadsheet_id=None):
+        if spreadsheet_id is None:
+            self._worksheet_properties.clear()
+            return
+        self._worksheet_properties.pop(spreadsheet_id, None)
+
+    async def create_worksheet(self, spreadsheet_id, sheet_name):
+        response = await self._execute_with_retry(
+            "POST",
+            f"{_spreadsheet_path(spreadsheet_id)}:batchUpdate",
+            body={"requests": [{"addSheet": {"properties": {"title": sheet_name}}}]},
+        )
+        self.invalidate_worksheet_properties(spreadsheet_id)
+        replies = response.get("replies", [{}])
+        add_sheet_reply = replies[0].get("addSheet", {})
+        return add_sheet_reply.get("properties", {})
+
+    async def batch_update_spreadsheet(self, spreadsheet_id, requests):
+        if not requests:
+            return
+        try:
+            await self._execute_with_retry(
+                "POST",
+                f"{_spreadsheet_path(spreadsheet_id)}:batchUpdate",
+                body={"requests": requests},
+            )
+        finally:
+            if changes_worksheet_layout(requests):
+                self.invalidate_worksheet_properties(spreadsheet_id)
+
+    async def update_values(self, spreadsheet_id, range_name, values, value_input_option="RAW"):
+        await self._execute_with_retry(
+            "PUT",
+            _values_path(spreadsheet_id, range_name),
+            params={"valueInputOption": value_input_option},
+            body={"values": values},
+        )
+
+    async def batch_update_values(self, spreadsheet_id, data, value_input_option="RAW"):
+        if not data:
+            return
+        await self._execute_with_retry(
+            "POST",
+            f"{_spreadsheet_path(spreadsheet_id)}/values:batchUpdate",
+            body={
+                "valueInputOption": value_input_option,
+                "data": data,
+            },
+        )
+
+    async def get_values(self, spreadsheet_id, range_name, major_dimension="ROWS"):
+        response = await self._execute_with_retry(
+            "GET",
+            _values_path(spreadsheet_id, range_name),
+            params={"majorDimension": major_dimension},
+        )
+        return response.get("values", [])
+
+    async def batch_get_values(self, spreadsheet_id, ranges, major_dimension="ROWS"):
+        if not ranges:
+            return []
+        params = [("ranges", range_name) for range_name in ranges]
+        params.append(("majorDimension", major_dimension))
+        response = await self._execute_with_retry(
+            "GET",
+            f"{_spreadsheet_path(spreadsheet_id)}/values:batchGet",
+            params=params,
+        )
+        value_ranges = response.get("valueRanges", [])
+        return [
+            value_ranges[index].get("values", []) if index < len(value_ranges) else []
+            for index in range(len(ranges))
+        ]
+
+    async def append_values(
+        self,
+        spreadsheet_id,
+        range_name,
+        values,
+        value_input_option="RAW",
+        insert_data_option="INSERT_ROWS",
+    ):
+        return await self._execute_with_retry(
+            "POST",
+            f"{_values_path(spreadsheet_id, range_name)}:append",
+            params={
+                "valueInputOption": value_input_option,
+                "insertDataOption": insert_data_option,
+            },
+            body={"values": values},
+        )
+
+
+def _spreadsheet_path(spreadsheet_id):
+    return quote(spreadsheet_id, safe="")
+
+
+def _values_path(spreadsheet_id, range_name):
+    return f"{_spreadsheet_path(spreadsheet_id)}/values/{quote(range_name, safe='')}"
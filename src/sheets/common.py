@@ -0,0 +1,79 @@
+"""Request-free helpers for the Sheets client and service."""
+
+import re
+
+
+WORKSHEET_PROPERTIES_FIELDS = "sheets.properties"
+# batchUpdate requests that change sheet ids or grid dimensions.
+LAYOUT_REQUEST_KINDS = frozenset(
+    {
+        "addSheet",
+        "deleteSheet",
+        "duplicateSheet",
+        "insertDimension",
+        "deleteDimension",
+        "appendDimension",
+        "updateSheetProperties",
+    }
+)
+UNAVAILABLE_MESSAGE = "Google Sheets is unavailable. Please try again later."
+REJECTED_MESSAGE = "Google Sheets rejected the request (HTTP {status})."
+A1_START_PATTERN = re.compile(r"^([A-Za-z]+)(\d+)")
+
+
+# Base for every Sheets failure callers are expected to handle.
+class SheetsError(RuntimeError):
+    pass
+
+
+class SheetsRetryableError(SheetsError):
+    pass
+
+
+def changes_worksheet_layout(requests):
+    return any(LAYOUT_REQUEST_KINDS.intersection(request) for request in requests)
+
+
+def index_worksheet_properties(spreadsheet):
+    properties_by_title = {}
+    for sheet in spreadsheet.get("sheets", []):
+        properties = sheet.get("properties", {})
+        if properties.get("title"):
+            properties_by_title[properties["title"]] = properties
+    return properties_by_title
+
+
+def convert_column_index_to_letter(index):
+    if index < 0:
+        raise ValueError("column index must be non-negative")
+
+    letters = []
+    current_index = index
+    while True:
+        current_index, remainder = divmod(current_index, 26)
+        letters.append(chr(65 + remainder))
+        if current_index == 0:
+            break
+        current_index -= 1
+
+    return "".join(reversed(letters))
+
+
+def convert_column_letter_to_index(letters):
+    if not letters or not letters.isalpha():
+        raise ValueError("column letters must be non-empty A-Z")
+
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + (ord(letter) - 64)
+    return index - 1
+
+
+def parse_range_start(range_name):
+    sheet_name, separator, cell_range = range_name.rpartition("!")
+    if not separator:
+        raise ValueError(f"Range must include a sheet name: {range_name}")
+    match = A1_START_PATTERN.match(cell_range)
+    if not match:
+        raise ValueError(f"Range must start with a cell reference: {range_name}")
+    return sheet_name, int(match.group(2)), convert_column_letter_to_index(match.group(1))
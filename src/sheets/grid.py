@@ -0,0 +1,214 @@
+"""In-memory view of the Attendance sheet with member and date indexes."""
+
+from datetime import datetime
+import functools
+import re
+
+from ..constants import DATA_START_ROW, MEMBER_COLUMNS, TOTAL_LABEL
+from ..data.members import build_member_identity_key, normalize_telegram_handle
+
+
+DATE_HEADER_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+DISPLAY_DATE_FORMATS = ("%d %b %Y (%A)", "%d %B %Y (%A)")
+
+
+class AttendanceGrid:
+    def __init__(self, header_rows, rows):
+        self.set_header_rows(header_rows)
+        # Rows past the last member (votes without a name/handle) are not part of the roster.
+        last_member_offset = max(
+            (offset for offset, row in enumerate(rows) if _member_cells(row) != ("", "")),
+            default=-1,
+        )
+        self.rows = [[_normalize_cell(value) for value in row] for row in rows[: last_member_offset + 1]]
+        self._rebuild_indexes()
+
+    @classmethod
+    def from_values(cls, header_values, row_values):
+        header_rows = (
+            header_values[0] if len(header_values) > 0 else [],
+            header_values[1] if len(header_values) > 1 else [],
+        )
+        return cls(header_rows, row_values)
+
+    @property
+    def last_row_index(self):
+        return DATA_START_ROW + len(self.rows) - 1
+
+    def iter_member_rows(self):
+        for offset, row in enumerate(self.rows):
+            if _member_cells(row) != ("", ""):
+                yield DATA_START_ROW + offset, row
+
+    def find_member_row(self, member):
+        return self._rows_by_key.get(build_member_identity_key(member))
+
+    def find_row_by_alias(self, alias):
+        return self._rows_by_alias.get(str(alias or "").strip().lower())
+
+    def get_cell(self, row_index, column_index):
+        row = self._row(row_index)
+        if row is None or column_index >= len(row):
+            return ""
+        return row[column_index]
+
+    def set_cell(self, row_index, column_index, value):
+        row = self._row(row_index)
+        if row is None:
+            return
+        if column_index >= len(row):
+            row.extend([""] * (column_index + 1 - len(row)))
+        row[column_index] = _normalize_cell(value)
+
+    def add_member_row(self, member, row_index):
+        offset = row_index - DATA_START_ROW
+        if offset < len(self.rows):
+            # Someone else's append landed first; keep our view aligned with the sheet.
+            self.rows[offset] = [member["name"], member["telegram"]]
+            self._rebuild_indexes()
+            return
+        self.rows.extend([] for _ in range(offset - len(self.rows)))
+        self.rows.append([member["name"], member["telegram"]])
+        self._index_row(row_index, self.rows[offset])
+
+    def remove_member_row(self, row_index):
+        offset = row_index - DATA_START_ROW
+        if 0 <= offset < len(self.rows):
+            del self.rows[offset]
+            self._rebuild_indexes()
+
+    def matches_sheet(self, header_values, member_values):
+        # False when the sheet's date/total columns or its member cells (A:B) no longer line up
+        # with this grid, e.g. after a hand edit that did not bump the version stamp.
+        header_rows = (
+            header_values[0] if len(header_values) > 0 else [],
+            header_values[1] if len(header_values) > 1 else [],
+        )
+        if parse_attendance_layout(*header_rows) != (
+            self.has_expected_table,
+            self.date_columns,
+            self.total_column_index,
+        ):
+            return False
+        sheet_members = [_member_cells(row) for row in member_values]
+        while sheet_members and sheet_members[-1] == ("", ""):
+            sheet_members.pop()
+        return sheet_members == [_member_cells(row) for row in self.rows]
+
+    def insert_column(self, column_index):
+        for row in self.header_rows + self.rows:
+            if column_index < len(row):
+                row.insert(column_index, "")
+
+    def remove_column(self, column_index):
+        for row in self.header_rows + self.rows:
+            if column_index < len(row):
+                del row[column_index]
+        self._refresh_layout()
+
+    def set_header_rows(self, header_rows):
+        self.header_rows = [
+            [_normalize_cell(value) for value in header_rows[0]],
+            [_normalize_cell(value) for value in header_rows[1]],
+        ]
+        self._refresh_layout()
+
+    def _refresh_layout(self):
+        self.has_expected_table, self.date_columns, self.total_column_index = (
+            parse_attendance_layout(*self.header_rows)
+        )
+
+    def _row(self, row_index):
+        offset = row_index - DATA_START_ROW
+        if 0 <= offset < len(self.rows):
+            return self.rows[offset]
+        return None
+
+    def _rebuild_indexes(self):
+        self._rows_by_key = {}
+        self._rows_by_alias = {}
+        for offset, row in enumerate(self.rows):
+            self._index_row(DATA_START_ROW + offset, row)
+
+    def _index_row(self, row_index, row):
+        member = build_member_from_sheet_row(row)
+        if member is None:
+            return
+        # First occurrence wins, matching a top-down scan of the sheet.
+        self._rows_by_key.setdefault(build_member_identity_key(member), row_index)
+        self._rows_by_alias.setdefault(member["name"].lower(), row_index)
+        if member["telegram"]:
+            self._rows_by_alias.setdefault(member["telegram"].lower(), row_index)
+
+
+def build_member_from_sheet_row(row_values):
+    member_name, member_telegram = _member_cells(row_values)
+    if member_telegram:
+        member_telegram = normalize_telegram_handle(member_telegram)
+    if not member_name and not member_telegram:
+        return None
+    if not member_name and member_telegram:
+        member_name = member_telegram.lstrip("@")
+    return {"name": member_name, "telegram": member_telegram}
+
+
+def parse_attendance_layout(header_row_one, header_row_two):
+    normalized_row_one = [_normalize_cell(value) for value in header_row_one]
+    normalized_row_two = [_normalize_cell(value) for value in header_row_two]
+
+    member_column_count = len(MEMBER_COLUMNS)
+    has_expected_table = (
+        len(normalized_row_two) >= member_column_count
+        and normalized_row_two[:member_column_count] == MEMBER_COLUMNS
+    )
+
+    date_columns = {}
+    for column_index, cell_value in enumerate(normalized_row_two):
+        parsed_date = parse_training_date_from_header(cell_value)
+        if parsed_date:
+            date_columns[parsed_date] = column_index
+
+    total_column_index = None
+    for column_index, cell_value in enumerate(normalized_row_one):
+        if cell_value == TOTAL_LABEL:
+            total_column_index = column_index
+            break
+
+    if total_column_index is None:
+        for column_index, cell_value in enumerate(normalized_row_two):
+            if cell_value == TOTAL_LABEL:
+                total_column_index = column_index
+                break
+
+    return has_expected_table, date_columns, total_column_index
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_training_date_from_header(cell_value):
+    if not cell_value:
+        return None
+
+    normalized_value = cell_value.strip()
+    if DATE_HEADER_PATTERN.match(normalized_value):
+        return normalized_value
+
+    for display_format in DISPLAY_DATE_FORMATS:
+        try:
+            parsed_date = datetime.strptime(normalized_value, display_format).date()
+            return parsed_date.isoformat()
+        except ValueError:
+            continue
+
+    return None
+
+
+def _member_cells(row_values):
+    member_name = str(row_values[0]).strip() if len(row_values) > 0 else ""
+    member_telegram = str(row_values[1]).strip() if len(row_values) > 1 else ""
+    return member_name, member_telegram
+
+
+def _normalize_cell(value):
+    if value is None:
+        return ""
+    return str(value).strip()
@@ -0,0 +1,201 @@
+"""Cross-instance lease serialising Attendance layout and roster changes."""
+
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+import random
+import threading
+import time
+import uuid
+
+from ..constants import LAYOUT_LEASE_TTL_SECONDS, LAYOUT_LEASE_WAIT_SECONDS
+from .common import UNAVAILABLE_MESSAGE, SheetsRetryableError
+
+
+LAYOUT_LEASE_NAME = "attendance-layout"
+LEASE_RETRY_BASE_DELAY = 0.1
+LEASE_RETRY_MAX_DELAY = 1.0
+LEASE_WRITE_MARGIN_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+# Stand-in for a single process (polling, self-hosted server, local checks).
+class MemoryLeaseBackend:
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._holders = {}
+
+    def try_acquire(self, name, owner, ttl):
+        with self._lock:
+            now = self._clock()
+            holder = self._holders.get(name)
+            if holder is not None and holder[0] != owner and holder[1] > now:
+                return False
+            self._holders[name] = (owner, now + ttl)
+            return True
+
+    def renew(self, name, owner, ttl):
+        with self._lock:
+            holder = self._holders.get(name)
+            if holder is None or holder[0] != owner:
+                return False
+            self._holders[name] = (owner, self._clock() + ttl)
+            return True
+
+    def release(self, name, owner):
+        with self._lock:
+            holder = self._holders.get(name)
+            if holder is not None and holder[0] == owner:
+                del self._holders[name]
+
+
+# Lease stored as a DynamoDB item. Every write is conditional on the current owner or on the
+# previous holder's expiry, so takeover, renewal and release cannot clobber another holder.
+class DynamoDbLeaseBackend:
+    def __init__(self, table_name, dynamodb_client=None, clock=time.time):
+        self.table_name = table_name
+        self._dynamodb_client = dynamodb_client
+        self._clock = clock
+
+    def _client(self):
+        if self._dynamodb_client is None:
+            from ..clients import get_dynamodb_client
+
+            self._dynamodb_client = get_dynamodb_client()
+        return self._dynamodb_client
+
+    def try_acquire(self, name, owner, ttl):
+        now = self._clock()
+        return self._conditional_write(
+            "put_item",
+            Item={
+                "lease_name": {"S": name},
+                "owner": {"S": owner},
+                "expires_at": {"N": repr(now + ttl)},
+            },
+            ConditionExpression="attribute_not_exists(lease_name) OR expires_at < :now",
+            ExpressionAttributeValues={":now": {"N": repr(now)}},
+        )
+
+    def renew(self, name, owner, ttl):
+        return self._conditional_write(
+            "update_item",
+            Key={"lease_name": {"S": name}},
+            UpdateExpression="SET expires_at = :expires_at",
+            ConditionExpression="#owner = :owner",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={
+                ":owner": {"S": owner},
+                ":expires_at": {"N": repr(self._clock() + ttl)},
+            },
+        )
+
+    def release(self, name, owner):
+        self._conditional_write(
+            "delete_item",
+            Key={"lease_name": {"S": name}},
+            ConditionExpression="#owner = :owner",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={":owner": {"S": owner}},
+        )
+
+    def _conditional_write(self, operation, **kwargs):
+        client = self._client()
+        try:
+            getattr(client, operation)(TableName=self.table_name, **kwargs)
+            return True
+        except client.exceptions.ConditionalCheckFailedException:
+            return False
+
+
+class LayoutLease:
+    def __init__(
+        self,
+        backend,
+        name=LAYOUT_LEASE_NAME,
+        ttl=LAYOUT_LEASE_TTL_SECONDS,
+        wait_timeout=LAYOUT_LEASE_WAIT_SECONDS,
+    ):
+        self.backend = backend
+        self.name = name
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+
+    @asynccontextmanager
+    async def hold(self):
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+        attempt = 0
+        while True:
+            acquired_at = time.monotonic()
+            if await asyncio.to_thread(self.backend.try_acquire, self.name, owner, self.ttl):
+                break
+            delay = random.uniform(
+                LEASE_RETRY_BASE_DELAY, min(LEASE_RETRY_MAX_DELAY, LEASE_RETRY_BASE_DELAY * 2**attempt)
+            )
+            if time.monotonic() + delay > deadline:
+                raise SheetsRetryableError(UNAVAILABLE_MESSAGE)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        held = HeldLease(acquired_at + self.ttl)
+        keeper = asyncio.create_task(self._keep_alive(owner, held))
+        try:
+            yield held
+        finally:
+            keeper.cancel()
+            try:
+                await keeper
+            except asyncio.CancelledError:
+                pass
+            # Conditional on the owner, so a lease taken over meanwhile is left alone.
+            await asyncio.to_thread(self.backend.release, self.name, owner)
+
+    async def _keep_alive(self, owner, held):
+        # Renew well before expiry. A lease that could not be renewed in time may already
+        # belong to another instance, so it is marked lost and held.check() stops our writes.
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            renew_started = time.monotonic()
+            try:
+                renewed = await asyncio.wait_for(
+                    asyncio.to_thread(self.backend.renew, self.name, owner, self.ttl),
+                    max(held.expires_at - renew_started, 0),
+                )
+            except asyncio.TimeoutError:
+                renewed = False
+            except Exception:
+                logger.warning("Failed to renew the %s lease.", self.name, exc_info=True)
+                if held.expires_at - time.monotonic() > self.ttl / 3:
+                    continue
+                renewed = False
+            if not renewed:
+                logger.warning("Lost the %s lease; abandoning the change.", self.name)
+                held.lost = True
+                return
+            held.expires_at = renew_started + self.ttl
+
+
+# Fencing for writes made under the lease: each one checks it is still ours first.
+class HeldLease:
+    def __init__(self, expires_at):
+        self.expires_at = expires_at
+        self.lost = False
+
+    def check(self):
+        # The margin covers a write still in flight when the lease runs out.
+        if self.lost or self.expires_at - time.monotonic() < LEASE_WRITE_MARGIN_SECONDS:
+            self.lost = True
+            raise SheetsRetryableError(UNAVAILABLE_MESSAGE)
+
+
+# Shared by every SheetsService in the process, like the Sheets rate limiter.
+MEMORY_LEASE_BACKEND = MemoryLeaseBackend()
+
+
+def create_layout_lease(table_name=None):
+    if table_name:
+        return LayoutLease(DynamoDbLeaseBackend(table_name))
+    return LayoutLease(MEMORY_LEASE_BACKEND)
@@ -0,0 +1,65 @@
+"""Asyncio locks: the shared/exclusive Attendance layout lock and per-loop lock holders."""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+
+# asyncio primitives belong to one event loop; this rebuilds them when another loop asks.
+class LoopBound:
+    def __init__(self, factory):
+        self._factory = factory
+        self._loop = None
+        self.value = None
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self.value = self._factory()
+            self._loop = loop
+        return self.value
+
+    def clear(self):
+        self._loop = None
+        self.value = None
+
+
+class SharedExclusiveLock:
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._shared_holders = 0
+        self._exclusive_held = False
+        self._exclusive_waiters = 0
+
+    @asynccontextmanager
+    async def shared(self):
+        async with self._condition:
+            # Waiting exclusive holders go first so a steady stream of votes cannot starve them.
+            await self._condition.wait_for(
+                lambda: not self._exclusive_held and not self._exclusive_waiters
+            )
+            self._shared_holders += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._shared_holders -= 1
+                if not self._shared_holders:
+                    self._condition.notify_all()
+
+    @asynccontextmanager
+    async def exclusive(self):
+        async with self._condition:
+            self._exclusive_waiters += 1
+            try:
+                await self._condition.wait_for(
+                    lambda: not self._exclusive_held and not self._shared_holders
+                )
+            finally:
+                self._exclusive_waiters -= 1
+            self._exclusive_held = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._exclusive_held = False
+                self._condition.notify_all()
@@ -0,0 +1,51 @@
+"""In-process index of the Polls sheet by poll id and by training date."""
+
+POLL_META_FIELDS = (
+    "poll_id",
+    "poll_type",
+    "training_date",
+    "chat_id",
+    "message_id",
+    "message_link",
+    "target_user_id",
+    "created_at",
+)
+
+
+class PollIndex:
+    def __init__(self):
+        self.loaded = False
+        self._polls_by_id = {}
+        self._latest_by_training = {}
+
+    def load(self, rows):
+        self._polls_by_id = {}
+        self._latest_by_training = {}
+        for row in rows:
+            if len(row) > 0 and row[0]:
+                self.add(build_poll_meta_from_row(row))
+        self.loaded = True
+
+    def add(self, poll_meta):
+        self._polls_by_id[poll_meta["poll_id"]] = poll_meta
+        if poll_meta["training_date"]:
+            # Rows are appended in creation order, so the last one seen is the latest.
+            key = (poll_meta["training_date"], poll_meta["poll_type"])
+            self._latest_by_training[key] = poll_meta
+
+    def get(self, poll_id):
+        return self._polls_by_id.get(poll_id)
+
+    def get_latest(self, training_date, poll_type="training"):
+        return self._latest_by_training.get((training_date, poll_type))
+
+
+def build_poll_meta_from_row(row):
+    return {
+        field: str(row[index]) if index < len(row) else ""
+        for index, field in enumerate(POLL_META_FIELDS)
+    }
+
+
+def build_row_from_poll_meta(poll_meta):
+    return [poll_meta[field] for field in POLL_META_FIELDS]
@@ -0,0 +1,70 @@
+"""Client-side token buckets that keep Sheets calls under the per-minute quotas."""
+
+import asyncio
+import threading
+import time
+
+from ..constants import (
+    SHEETS_RATE_LIMIT_BURST,
+    SHEETS_RATE_LIMIT_MAX_WAIT_SECONDS,
+    SHEETS_READ_REQUESTS_PER_MINUTE,
+    SHEETS_WRITE_REQUESTS_PER_MINUTE,
+)
+
+
+READ = "read"
+WRITE = "write"
+
+
+class RateLimitExceeded(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, requests_per_minute, burst, clock=time.monotonic):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated_at = clock()
+
+    def reserve(self, max_wait=None):
+        # Tokens may go negative: each caller reserves its slot and waits its turn,
+        # so a burst is smoothed out in arrival order instead of racing.
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            wait = max(0.0, (1.0 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                raise RateLimitExceeded(f"Rate limit wait of {wait:.1f}s exceeds {max_wait:.1f}s.")
+            self._tokens -= 1.0
+            return wait
+
+    async def acquire_async(self, max_wait=None):
+        wait = self.reserve(max_wait)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class SheetsRateLimiter:
+    def __init__(
+        self,
+        reads_per_minute=SHEETS_READ_REQUESTS_PER_MINUTE,
+        writes_per_minute=SHEETS_WRITE_REQUESTS_PER_MINUTE,
+        burst=SHEETS_RATE_LIMIT_BURST,
+        max_wait=SHEETS_RATE_LIMIT_MAX_WAIT_SECONDS,
+    ):
+        self.max_wait = max_wait
+        self.buckets = {
+            READ: TokenBucket(reads_per_minute, burst),
+            WRITE: TokenBucket(writes_per_minute, burst),
+        }
+
+    async def acquire_async(self, kind):
+        await self.buckets[kind].acquire_async(self.max_wait)
+
+
+# Shared by every Sheets client in the process, so polling mode stays under one quota.
+SHEETS_RATE_LIMITER = SheetsRateLimiter()
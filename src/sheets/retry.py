@@ -0,0 +1,127 @@
+"""Retry classification, backoff and circuit breaking for Sheets API calls."""
+
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import random
+import threading
+import time
+
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts=4,
+        base_delay=0.25,
+        max_delay=4.0,
+        max_total_delay=8.0,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Keeps retries well inside the 30s Lambda timeout.
+        self.max_total_delay = max_total_delay
+
+    def get_delay(self, attempt, total_delay, retry_after=None):
+        # Seconds to wait before the next attempt, or None to give up.
+        if attempt + 1 >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            # Full jitter spreads retries from concurrent containers apart.
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if total_delay + delay > self.max_total_delay:
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failure_count = 0
+        self._opened_at = None
+        self._probe_started_at = None
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None and not self._reset_elapsed(self._opened_at)
+
+    def allow_request(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._reset_elapsed(self._opened_at):
+                return False
+            if self._probe_started_at is not None and not self._reset_elapsed(
+                self._probe_started_at
+            ):
+                return False
+            # Half-open: let a single probe through (another one if it never reports back).
+            self._probe_started_at = self._clock()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failure_count = 0
+            self._opened_at = None
+            self._probe_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failure_count += 1
+            if self._opened_at is not None or self._failure_count >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probe_started_at = None
+
+    def _reset_elapsed(self, since):
+        return self._clock() - since >= self.reset_timeout
+
+
+# Shared by every Sheets client in the process.
+SHEETS_CIRCUIT_BREAKER = CircuitBreaker()
+
+
+def get_status_code(exc):
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable_error(exc, transport_errors=()):
+    status = get_status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return isinstance(exc, transport_errors)
+
+
+def get_retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return None
+    return parse_retry_after(headers.get("retry-after"))
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -1,17 +1,30 @@
 """Google Sheets service for attendance, trainings, and polls."""
 
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime
-import re
+import functools
+import time
 
 from ..constants import (
+    ADMIN_CACHE_TTL_SECONDS,
+    ATTENDANCE_GRID_TTL_SECONDS,
     DATA_START_ROW,
+    HEADER_ROW_COUNT,
     MEMBER_COLUMNS,
     MEMBER_INFO_LABEL,
     TOTAL_LABEL,
     TRAINING_DATES_LABEL,
 )
 from ..data.members import build_member_identity_key, normalize_telegram_handle
-from .client import convert_column_index_to_letter
+from .common import convert_column_index_to_letter, parse_range_start
+from .grid import AttendanceGrid
+from .lease import create_layout_lease
+from .locks import LoopBound, SharedExclusiveLock
+from .polls import PollIndex, build_poll_meta_from_row, build_row_from_poll_meta
+from .week import WeekContext
+from .write_buffer import ValueWriteBuffer
 
 
 ATTENDANCE_SHEET = "Attendance"
@@ -31,175 +44,616 @@ POLLS_HEADERS = [
     "CreatedAt",
 ]
 ADMINS_HEADERS = ["Username"]
+META_SHEET = "Meta"
+META_HEADERS = ["SheetVersion"]
+TABLE_HEADERS = {
+    TRAININGS_SHEET: TRAININGS_HEADERS,
+    POLLS_SHEET: POLLS_HEADERS,
+    ADMINS_SHEET: ADMINS_HEADERS,
+    META_SHEET: META_HEADERS,
+}
+# Incremented by every layout, roster, Trainings or Polls change the bot makes, so a warm
+# instance can tell from one small read whether its cached grid and poll index still hold.
+SHEET_VERSION_RANGE = f"{META_SHEET}!A2"
+
+# Bump when the bootstrap below changes so existing spreadsheets are migrated once.
+SCHEMA_VERSION = "3"
+SCHEMA_VERSION_METADATA_KEY = "attendance_bot_schema_version"
+SCHEMA_FIELDS = (
+    "sheets(properties,conditionalFormats),developerMetadata(metadataKey,metadataValue)"
+)
+
+
+LAYOUT_SHARED = "shared"
+LAYOUT_EXCLUSIVE = "exclusive"
+
+
+class _LayoutChangeRequired(Exception):
+    pass
+
+
+def _with_batched_writes(method):
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        async with self.batched_writes():
+            return await method(self, *args, **kwargs)
+
+    return wrapper
 
-DATE_HEADER_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
-DISPLAY_DATE_FORMATS = ("%d %b %Y (%A)", "%d %B %Y (%A)")
+
+def _with_layout_lock(exclusive=False):
+    # Units of work on the Attendance sheet. Shared units (votes, roster reads) run in
+    # parallel; one that finds the layout must change is re-run under the exclusive lock.
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            if self._layout_lock_mode.get() is not None:
+                return await method(self, *args, **kwargs)
+            if not exclusive:
+                try:
+                    async with self._layout_locked_unit(LAYOUT_SHARED):
+                        return await method(self, *args, **kwargs)
+                except _LayoutChangeRequired:
+                    pass
+            async with self._layout_locked_unit(LAYOUT_EXCLUSIVE):
+                return await method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
 
 class SheetsService:
-    def __init__(self, client, spreadsheet_id, sheet_name=None):
+    def __init__(
+        self,
+        client,
+        spreadsheet_id,
+        sheet_name=None,
+        grid_ttl=ATTENDANCE_GRID_TTL_SECONDS,
+        admin_cache_ttl=ADMIN_CACHE_TTL_SECONDS,
+        layout_lease=None,
+    ):
         self.client = client
         self.spreadsheet_id = spreadsheet_id
         self.sheet_name = sheet_name or ATTENDANCE_SHEET
-        self._conditional_formats_cleared = False
+        self.grid_ttl = grid_ttl
+        self.admin_cache_ttl = admin_cache_ttl
+        self.layout_lease = layout_lease or create_layout_lease()
+        self._schema_verified = False
+        self._locks = LoopBound(
+            lambda: {
+                "schema": asyncio.Lock(),
+                "layout": SharedExclusiveLock(),
+                "roster": asyncio.Lock(),
+            }
+        )
+        self._attendance_grid = None
+        self._attendance_grid_loaded_at = None
+        self._poll_index = PollIndex()
+        # SHEET_VERSION_RANGE value the cached grid and poll index were read at.
+        self._sheet_version = None
+        self._admin_usernames = None
+        self._admin_usernames_loaded_at = None
+        # Per-task so concurrent units of work never share or flush each other's writes.
+        self._write_buffer = ContextVar(f"sheets_write_buffer_{id(self)}", default=None)
+        self._layout_lock_mode = ContextVar(f"sheets_layout_lock_mode_{id(self)}", default=None)
+        self._lease_state = ContextVar(f"sheets_layout_lease_state_{id(self)}", default=None)
+
+    @asynccontextmanager
+    async def batched_writes(self):
+        current_buffer = self._write_buffer.get()
+        if current_buffer is not None:
+            yield current_buffer
+            return
 
-    def register_member(self, user):
-        trainings = self._load_trainings_from_sheet()
-        layout_info = self._ensure_training_columns(trainings)
+        write_buffer = ValueWriteBuffer()
+        token = self._write_buffer.set(write_buffer)
+        try:
+            yield write_buffer
+            # Only reached without an exception; a failed unit of work drops its writes.
+            if write_buffer:
+                self._check_layout_lease()
+            await write_buffer.flush(self.client, self.spreadsheet_id)
+        except BaseException:
+            # The grid may already reflect writes that never reached the sheet.
+            self.invalidate_attendance_grid()
+            raise
+        finally:
+            self._write_buffer.reset(token)
+
+    @asynccontextmanager
+    async def _layout_locked_unit(self, mode):
+        layout_lock = self._locks.get()["layout"]
+        acquire = layout_lock.exclusive if mode == LAYOUT_EXCLUSIVE else layout_lock.shared
+        async with acquire():
+            token = self._layout_lock_mode.set(mode)
+            try:
+                if mode == LAYOUT_EXCLUSIVE:
+                    async with self._hold_layout_lease():
+                        async with self.batched_writes():
+                            yield
+                else:
+                    # Buffered cell addresses assume the current layout, so they flush under the lock.
+                    async with self.batched_writes():
+                        yield
+            finally:
+                self._layout_lock_mode.reset(token)
+
+    @asynccontextmanager
+    async def _hold_layout_lease(self, check_version=True):
+        if self._lease_state.get() is not None:
+            yield
+            return
+        if check_version:
+            # The version stamp lives on the Meta sheet, which the schema bootstrap creates.
+            await self.ensure_schema()
+        async with self.layout_lease.hold() as held_lease:
+            lease_state = {"changed": False, "lease": held_lease}
+            token = self._lease_state.set(lease_state)
+            try:
+                if check_version:
+                    # Other instances may have changed the sheet while we waited.
+                    await self._check_sheet_version()
+                yield
+            except BaseException:
+                # Part of the change may have landed; the bump below still tells other
+                # instances, but our own cached view cannot be trusted either.
+                self.invalidate_snapshot()
+                raise
+            finally:
+                self._lease_state.reset(token)
+                if lease_state["changed"]:
+                    if not check_version:
+                        await self._check_sheet_version()
+                    held_lease.check()
+                    await self._bump_sheet_version()
+
+    def _mark_sheet_changed(self):
+        # Writes made while holding the lease are the structural ones; see _hold_layout_lease.
+        lease_state = self._lease_state.get()
+        if lease_state is not None:
+            self._check_layout_lease()
+            lease_state["changed"] = True
+
+    def _check_layout_lease(self):
+        # A write under a lease that has run out could race the instance that took it over.
+        lease_state = self._lease_state.get()
+        if lease_state is not None:
+            lease_state["lease"].check()
+
+    async def _check_sheet_version(self):
+        values = await self.client.get_values(self.spreadsheet_id, SHEET_VERSION_RANGE)
+        return self._apply_sheet_version(values)
+
+    def _apply_sheet_version(self, values):
+        # Returns True when the cached grid and poll index had to be dropped.
+        version = _parse_sheet_version(values)
+        if version == self._sheet_version:
+            return False
+        self.invalidate_snapshot()
+        self._sheet_version = version
+        return True
 
-        member_item = {
-            "name": " ".join(part for part in [user.first_name, user.last_name] if part),
-            "handle": f"@{user.username}" if user.username else "",
-        }
-        member_for_sheet = self._normalize_member_for_sheet(member_item)
-        self._ensure_member_row(member_for_sheet, layout_info)
-        return member_item
+    async def _bump_sheet_version(self):
+        # Only called under the lease, after _check_sheet_version, so no increment is lost.
+        # Written directly: a buffered write would land after the lease is released.
+        version = (self._sheet_version or 0) + 1
+        await self.client.update_values(self.spreadsheet_id, SHEET_VERSION_RANGE, [[str(version)]])
+        # Our own grid and poll index changes were applied in place.
+        self._sheet_version = version
+
+    async def _write_values(self, range_name, values, value_input_option="RAW"):
+        self._mark_sheet_changed()
+        write_buffer = self._write_buffer.get()
+        if write_buffer is not None:
+            write_buffer.add(range_name, values, value_input_option)
+            return
+        await self.client.update_values(
+            self.spreadsheet_id, range_name, values, value_input_option=value_input_option
+        )
+
+    async def _flush_pending_writes(self):
+        write_buffer = self._write_buffer.get()
+        if write_buffer:
+            self._check_layout_lease()
+            await write_buffer.flush(self.client, self.spreadsheet_id)
+
+    async def _batch_update_spreadsheet(self, requests):
+        # Buffered ranges are addressed against the current layout, so land them first.
+        await self._flush_pending_writes()
+        self._mark_sheet_changed()
+        await self.client.batch_update_spreadsheet(self.spreadsheet_id, requests)
 
-    def remove_member(self, handle):
-        member_rows = self.client.get_values(
+    async def _append_values(
+        self,
+        range_name,
+        values,
+        value_input_option="RAW",
+        insert_data_option="INSERT_ROWS",
+    ):
+        await self._flush_pending_writes()
+        self._mark_sheet_changed()
+        return await self.client.append_values(
             self.spreadsheet_id,
-            f"{self.sheet_name}!A{DATA_START_ROW}:B",
+            range_name,
+            values,
+            value_input_option=value_input_option,
+            insert_data_option=insert_data_option,
         )
-        for index, row in enumerate(member_rows):
-            row_handle = row[1] if len(row) > 1 else ""
-            if row_handle == handle:
-                sheet_id = self.client.get_worksheet_properties_by_title(
-                    self.spreadsheet_id,
-                    self.sheet_name,
-                ).get("sheetId")
-                row_index = DATA_START_ROW + index
-                self.client.batch_update_spreadsheet(
-                    self.spreadsheet_id,
-                    [
-                        {
-                            "deleteDimension": {
-                                "range": {
-                                    "sheetId": sheet_id,
-                                    "dimension": "ROWS",
-                                    "startIndex": row_index - 1,
-                                    "endIndex": row_index,
-                                }
-                            }
-                        }
-                    ],
-                )
-                return True
-        return False
 
-    def add_training(self, training_date, timing, description):
-        self._upsert_training_row(
-            {"date": training_date, "timing": timing, "description": description},
-        )
-        trainings = self._load_trainings_from_sheet()
-        self._ensure_training_columns(trainings)
+    @_with_layout_lock()
+    async def register_member(self, user):
+        snapshot = await self._load_attendance_snapshot()
+        await self._ensure_training_columns(snapshot)
 
-    def cancel_training(self, training_date):
-        deleted = self._delete_training_row(training_date)
-        self._remove_training_column(training_date)
-        return deleted
+        member_item = self._build_member_item(user)
+        member_for_sheet = self._normalize_member_for_sheet(member_item)
+        await self._ensure_member_rows([member_for_sheet], snapshot["grid"])
+        return member_item
 
-    def record_poll_answer(self, user, training_date, status):
-        trainings = self._load_trainings_from_sheet()
-        layout_info = self._ensure_training_columns(trainings)
+    @_with_layout_lock(exclusive=True)
+    async def remove_member(self, handle):
+        # Read afresh: a hand-sorted sheet does not bump the version, and a stale row index
+        # here would delete someone else's row.
+        grid = await self._reload_attendance_grid()
+        row_index = grid.find_row_by_alias(handle)
+        if row_index is None:
+            return False
 
-        member_item = {
-            "name": " ".join(part for part in [user.first_name, user.last_name] if part),
-            "handle": f"@{user.username}" if user.username else "",
-        }
-        member_for_sheet = self._normalize_member_for_sheet(member_item)
-        row_index, _ = self._ensure_member_row(member_for_sheet, layout_info)
+        sheet_id = await self._get_sheet_id(self.sheet_name)
+        await self._batch_update_spreadsheet(
+            [
+                {
+                    "deleteDimension": {
+                        "range": {
+                            "sheetId": sheet_id,
+                            "dimension": "ROWS",
+                            "startIndex": row_index - 1,
+                            "endIndex": row_index,
+                        }
+                    }
+                }
+            ],
+        )
+        grid.remove_member_row(row_index)
+        return True
 
-        column_index = layout_info["date_columns"].get(training_date)
-        if column_index is None:
-            return
+    @_with_layout_lock(exclusive=True)
+    async def add_training(self, training_date, timing, description):
+        snapshot = await self._load_attendance_snapshot()
+        training = {"date": training_date, "timing": timing, "description": description}
+        await self._upsert_training_row(training, snapshot["training_rows"])
+        snapshot["trainings"] = [
+            item for item in snapshot["trainings"] if item["date"] != training_date
+        ] + [training]
+        await self._ensure_training_columns(snapshot)
+
+    @_with_layout_lock(exclusive=True)
+    async def cancel_training(self, training_date):
+        snapshot = await self._load_attendance_snapshot()
+        deleted = await self._delete_training_row(training_date, snapshot["training_rows"])
+        await self._remove_training_column(training_date, snapshot["sheet_properties"], snapshot["grid"])
+        return deleted
 
-        self._update_attendance_cell(row_index, column_index, status)
+    async def record_poll_answer(self, user, training_date, status):
+        await self.record_poll_answers([(user, training_date, status)])
 
-    def get_week_trainings(self, start_date, end_date):
-        trainings = self._load_trainings_from_sheet()
-        return [
-            training
-            for training in trainings
-            if start_date <= training.get("date", "") <= end_date
-        ]
+    @_with_layout_lock()
+    async def record_poll_answers(self, answers):
+        snapshot = await self._load_attendance_snapshot()
+        layout_info = await self._ensure_training_columns(snapshot)
 
-    def find_members_missing_vote(self, training_date):
-        member_rows = self.client.get_values(
-            self.spreadsheet_id,
-            f"{self.sheet_name}!A{DATA_START_ROW}:B",
-        )
-        trainings = self._load_trainings_from_sheet()
-        layout_info = self._ensure_training_columns(trainings)
-        column_index = layout_info["date_columns"].get(training_date)
-        if column_index is None:
-            return []
+        grid = snapshot["grid"]
+        members = [
+            self._normalize_member_for_sheet(self._build_member_item(user))
+            for user, _, _ in answers
+        ]
+        row_indexes = await self._ensure_member_rows(members, grid)
+        grid = self._attendance_grid or grid
 
-        column_letter = chr(65 + column_index)
-        attendance_column = self.client.get_values(
-            self.spreadsheet_id,
-            f"{self.sheet_name}!{column_letter}{DATA_START_ROW}:{column_letter}",
+        # Cells land in the unit of work's buffer, so the whole batch is one values.batchUpdate.
+        for (_, training_date, status), row_index in zip(answers, row_indexes):
+            column_index = layout_info["date_columns"].get(training_date)
+            if column_index is None:
+                continue
+            await self._update_attendance_cell(row_index, column_index, status)
+            grid.set_cell(row_index, column_index, status)
+
+    @_with_layout_lock()
+    async def load_week_context(self, start_date, end_date):
+        # Trainings, Polls and Attendance come from one values.batchGet and one layout ensure.
+        snapshot = await self._load_attendance_snapshot(include_polls=True, fresh_votes=True)
+        layout_info = await self._ensure_training_columns(snapshot)
+        return WeekContext.from_snapshot(
+            start_date,
+            end_date,
+            snapshot["trainings"],
+            self._poll_index,
+            snapshot["grid"],
+            layout_info["date_columns"],
         )
 
-        missing = []
-        for idx, row in enumerate(member_rows):
-            handle_value = row[1] if len(row) > 1 else ""
-            voted_value = (
-                attendance_column[idx][0]
-                if idx < len(attendance_column) and attendance_column[idx]
-                else ""
-            )
-            if not voted_value and handle_value:
-                missing.append({"handle": handle_value, "name": row[0] if row else ""})
-        return missing
-
-    def append_poll_metadata(self, **kwargs):
-        self._append_poll_meta(**kwargs)
+    @_with_batched_writes
+    async def append_poll_metadata(self, **kwargs):
+        await self.append_poll_metadata_batch([kwargs])
 
-    def get_poll_metadata(self, poll_id):
-        return self._get_poll_meta(poll_id)
+    async def append_poll_metadata_batch(self, entries):
+        await self._append_poll_metas([self._build_poll_meta(**entry) for entry in entries])
 
-    def get_latest_poll_for_training(self, training_date):
-        return self._get_latest_training_poll_meta(training_date)
+    async def get_poll_metadata(self, poll_id):
+        return await self._get_poll_meta(poll_id)
 
-    def ensure_attendance_columns(self):
-        trainings = self._load_trainings_from_sheet()
-        self._ensure_training_columns(trainings)
+    async def ensure_polls_indexed(self, poll_ids):
+        # One Polls read covers every poll a batch of updates refers to.
+        if not self._poll_index.loaded or any(
+            self._poll_index.get(poll_id) is None for poll_id in poll_ids
+        ):
+            await self._load_poll_index()
 
-    def is_admin(self, username):
+    async def is_admin(self, username):
         if not username:
             return False
         normalized = self._normalize_admin_username(username)
         if not normalized:
             return False
-        self._ensure_sheet_exists(ADMINS_SHEET, ADMINS_HEADERS)
-        rows = self.client.get_values(self.spreadsheet_id, f"{ADMINS_SHEET}!A2:A")
-        for row in rows:
-            if not row:
-                continue
-            candidate = self._normalize_admin_username(row[0])
-            if candidate and candidate == normalized:
-                return True
-        return False
+        admin_usernames = self._admin_usernames
+        if admin_usernames is None or (
+            time.monotonic() - self._admin_usernames_loaded_at >= self.admin_cache_ttl
+        ):
+            admin_usernames = await self.refresh_admins()
+        return normalized in admin_usernames
+
+    async def refresh_admins(self, min_age=0.0):
+        # A list loaded less than min_age seconds ago is returned as is.
+        if (
+            self._admin_usernames is not None
+            and time.monotonic() - self._admin_usernames_loaded_at < min_age
+        ):
+            return self._admin_usernames
+        rows = await self._read_table(ADMINS_SHEET, ADMINS_HEADERS)
+        admin_usernames = frozenset(
+            self._normalize_admin_username(row[0]) for row in rows if row and row[0]
+        ) - {""}
+        self._admin_usernames = admin_usernames
+        self._admin_usernames_loaded_at = time.monotonic()
+        return admin_usernames
+
+    async def ensure_schema(self):
+        if self._schema_verified:
+            return
+        async with self._locks.get()["schema"]:
+            if not self._schema_verified:
+                await self._bootstrap_schema()
+                self._schema_verified = True
+
+    async def _bootstrap_schema(self):
+        spreadsheet, schema_metadata = await self._read_schema()
+        if schema_metadata and schema_metadata.get("metadataValue") == SCHEMA_VERSION:
+            return
+        async with self._hold_layout_lease(check_version=False):
+            # Re-read under the lease: another instance may have migrated it meanwhile.
+            spreadsheet, schema_metadata = await self._read_schema()
+            if schema_metadata and schema_metadata.get("metadataValue") == SCHEMA_VERSION:
+                return
+            await self._migrate_schema(spreadsheet, schema_metadata)
+
+    async def _read_schema(self):
+        spreadsheet = await self.client.get_spreadsheet(self.spreadsheet_id, fields=SCHEMA_FIELDS)
+        self.client.store_worksheet_properties(self.spreadsheet_id, spreadsheet)
+        for metadata in spreadsheet.get("developerMetadata", []):
+            if metadata.get("metadataKey") == SCHEMA_VERSION_METADATA_KEY:
+                return spreadsheet, metadata
+        return spreadsheet, None
+
+    async def _migrate_schema(self, spreadsheet, schema_metadata):
+        sheets_by_title = {
+            sheet.get("properties", {}).get("title"): sheet
+            for sheet in spreadsheet.get("sheets", [])
+        }
+        existing_tables = [title for title in TABLE_HEADERS if title in sheets_by_title]
+        header_values = await self._read_ranges(
+            *[self._build_headers_range(title, TABLE_HEADERS[title]) for title in existing_tables]
+        )
+        existing_headers = dict(zip(existing_tables, header_values))
+
+        next_sheet_id = max(
+            (sheet.get("properties", {}).get("sheetId", 0) for sheet in sheets_by_title.values()),
+            default=0,
+        ) + 1
+        requests = []
+        for title in [*TABLE_HEADERS, self.sheet_name]:
+            sheet = sheets_by_title.get(title)
+            if sheet is None:
+                # Choosing the id lets the header cells below go in the same batchUpdate.
+                sheet_id = next_sheet_id
+                next_sheet_id += 1
+                properties = {"sheetId": sheet_id, "title": title}
+                if title == META_SHEET:
+                    properties["hidden"] = True
+                requests.append({"addSheet": {"properties": properties}})
+            else:
+                sheet_id = sheet["properties"]["sheetId"]
+            headers = TABLE_HEADERS.get(title)
+            existing_rows = existing_headers.get(title)
+            if headers and (not existing_rows or not existing_rows[0]):
+                requests.append(self._build_header_cells_request(sheet_id, headers))
+
+        attendance_sheet = sheets_by_title.get(self.sheet_name) or {}
+        conditional_formats = attendance_sheet.get("conditionalFormats", [])
+        requests.extend(
+            {
+                "deleteConditionalFormatRule": {
+                    "sheetId": attendance_sheet["properties"]["sheetId"],
+                    "index": index,
+                }
+            }
+            for index in reversed(range(len(conditional_formats)))
+        )
+        if requests:
+            await self._batch_update_spreadsheet(requests)
+        if attendance_sheet:
+            # Sheets laid out before the single ARRAYFORMULA still carry per-row SUMs, and the
+            # formula is otherwise only rewritten when date columns move.
+            grid = await self._reload_attendance_grid()
+            await self._ensure_total_formulas(grid.total_column_index, grid.date_columns, grid)
+        # Stamped last, so an interrupted migration runs again.
+        await self._batch_update_spreadsheet([self._build_schema_version_request(schema_metadata)])
+
+    def _build_header_cells_request(self, sheet_id, headers):
+        return {
+            "updateCells": {
+                "start": {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0},
+                "rows": [
+                    {"values": [{"userEnteredValue": {"stringValue": header}} for header in headers]}
+                ],
+                "fields": "userEnteredValue",
+            }
+        }
 
-    def _ensure_sheet_exists(self, sheet_name, headers=None):
-        properties = self.client.get_worksheet_properties_by_title(
-            self.spreadsheet_id,
-            sheet_name,
+    def _build_schema_version_request(self, schema_metadata):
+        if schema_metadata:
+            return {
+                "updateDeveloperMetadata": {
+                    "dataFilters": [
+                        {"developerMetadataLookup": {"metadataKey": SCHEMA_VERSION_METADATA_KEY}}
+                    ],
+                    "developerMetadata": {"metadataValue": SCHEMA_VERSION},
+                    "fields": "metadataValue",
+                }
+            }
+        return {
+            "createDeveloperMetadata": {
+                "developerMetadata": {
+                    "metadataKey": SCHEMA_VERSION_METADATA_KEY,
+                    "metadataValue": SCHEMA_VERSION,
+                    "location": {"spreadsheet": True},
+                    "visibility": "DOCUMENT",
+                }
+            }
+        }
+
+    async def _get_sheet_id(self, sheet_name):
+        properties = await self.client.get_worksheet_properties_by_title(
+            self.spreadsheet_id, sheet_name
+        )
+        return (properties or {}).get("sheetId")
+
+    def _build_headers_range(self, sheet_name, headers):
+        last_column_letter = convert_column_index_to_letter(len(headers) - 1)
+        return f"{sheet_name}!A1:{last_column_letter}1"
+
+    async def _read_ranges(self, *range_names):
+        return await self.client.batch_get_values(self.spreadsheet_id, range_names)
+
+    async def _read_table(self, sheet_name, headers):
+        await self.ensure_schema()
+        return await self.client.get_values(
+            self.spreadsheet_id, self._build_table_range(sheet_name, headers)
+        )
+
+    def _build_table_range(self, sheet_name, headers):
+        last_column_letter = convert_column_index_to_letter(len(headers) - 1)
+        return f"{sheet_name}!A2:{last_column_letter}"
+
+    async def _load_attendance_snapshot(self, include_polls=False, fresh_votes=False):
+        await self.ensure_schema()
+        if fresh_votes:
+            # Votes from other instances do not bump the version, so readers of them re-read the grid.
+            self.invalidate_attendance_grid()
+        grid = self._get_cached_attendance_grid()
+        if grid is not None:
+            snapshot = await self._read_snapshot(grid, include_polls)
+            if snapshot is not None:
+                return snapshot
+        # Member appends update the cached grid in place, so a reload must not interleave with one.
+        async with self._locks.get()["roster"]:
+            snapshot = None
+            while snapshot is None:
+                snapshot = await self._read_snapshot(self._get_cached_attendance_grid(), include_polls)
+            return snapshot
+
+    async def _read_snapshot(self, grid, include_polls):
+        # The version stamp and Trainings (plus Polls unless indexed, and the Attendance sheet
+        # or, for a cached grid, its header rows and member columns) in one values.batchGet.
+        sheet_properties = await self._ensure_sheet_properties()
+        load_polls = include_polls and not self._poll_index.loaded
+        range_names = [
+            SHEET_VERSION_RANGE,
+            self._build_table_range(TRAININGS_SHEET, TRAININGS_HEADERS),
+        ]
+        if load_polls:
+            range_names.append(self._build_table_range(POLLS_SHEET, POLLS_HEADERS))
+        header_range, rows_range = self._build_attendance_grid_ranges(sheet_properties)
+        if grid is None:
+            range_names.extend([header_range, rows_range])
+        else:
+            range_names.extend([header_range, f"{self.sheet_name}!A{DATA_START_ROW}:B"])
+        values = await self._read_ranges(*range_names)
+        if self._apply_sheet_version(values.pop(0)) and (
+            grid is not None or (include_polls and not load_polls)
+        ):
+            # Cached parts were read at an older version; the caller reads again without them.
+            return None
+        training_rows = values.pop(0)
+        if load_polls:
+            self._poll_index.load(values.pop(0))
+        if grid is not None and not grid.matches_sheet(values[0], values[1]):
+            # Hand edits do not bump the stamp; never write votes by a stale row or column.
+            self.invalidate_attendance_grid()
+            return None
+        if grid is None:
+            grid = self._store_attendance_grid(AttendanceGrid.from_values(values[0], values[1]))
+        return {
+            "sheet_properties": sheet_properties,
+            "training_rows": training_rows,
+            "trainings": self._parse_training_rows(training_rows),
+            "grid": grid,
+        }
+
+    async def _get_attendance_grid(self):
+        grid = self._get_cached_attendance_grid()
+        if grid is not None:
+            return grid
+        return await self._reload_attendance_grid()
+
+    async def _reload_attendance_grid(self):
+        sheet_properties = await self._ensure_sheet_properties()
+        header_values, row_values = await self._read_ranges(
+            *self._build_attendance_grid_ranges(sheet_properties)
         )
-        if not properties:
-            properties = self.client.create_worksheet(self.spreadsheet_id, sheet_name)
+        return self._store_attendance_grid(AttendanceGrid.from_values(header_values, row_values))
+
+    def _build_attendance_grid_ranges(self, sheet_properties):
+        column_count = sheet_properties.get("gridProperties", {}).get("columnCount", 26)
+        last_column_letter = convert_column_index_to_letter(max(0, column_count - 1))
+        return [
+            f"{self.sheet_name}!A1:{last_column_letter}{HEADER_ROW_COUNT}",
+            f"{self.sheet_name}!A{DATA_START_ROW}:{last_column_letter}",
+        ]
 
-        if headers:
-            header_range = f"{sheet_name}!A1:{chr(64 + len(headers))}1"
-            existing_headers = self.client.get_values(self.spreadsheet_id, header_range)
-            if not existing_headers or not existing_headers[0]:
-                self.client.update_values(self.spreadsheet_id, header_range, [headers])
+    def _get_cached_attendance_grid(self):
+        if self._attendance_grid is None:
+            return None
+        if time.monotonic() - self._attendance_grid_loaded_at >= self.grid_ttl:
+            self.invalidate_attendance_grid()
+            return None
+        return self._attendance_grid
 
-        return properties
+    def _store_attendance_grid(self, grid):
+        self._attendance_grid = grid
+        self._attendance_grid_loaded_at = time.monotonic()
+        return grid
 
-    def _load_trainings_from_sheet(self):
-        self._ensure_sheet_exists(TRAININGS_SHEET, TRAININGS_HEADERS)
-        rows = self.client.get_values(self.spreadsheet_id, f"{TRAININGS_SHEET}!A2:C")
+    def invalidate_attendance_grid(self):
+        self._attendance_grid = None
+        self._attendance_grid_loaded_at = None
+
+    def invalidate_snapshot(self):
+        self.invalidate_attendance_grid()
+        self._poll_index = PollIndex()
+        self.client.invalidate_worksheet_properties(self.spreadsheet_id)
+
+    def _parse_training_rows(self, rows):
         trainings = []
         for row in rows:
             date_value = row[0].strip() if len(row) > 0 else ""
@@ -222,15 +676,12 @@ class SheetsService:
             value = value[1:]
         return value.lower()
 
-    def _upsert_training_row(self, training):
-        self._ensure_sheet_exists(TRAININGS_SHEET, TRAININGS_HEADERS)
-        rows = self.client.get_values(self.spreadsheet_id, f"{TRAININGS_SHEET}!A2:C")
+    async def _upsert_training_row(self, training, rows):
         target_date = training.get("date")
         for idx, row in enumerate(rows, start=2):
             row_date = row[0].strip() if len(row) > 0 else ""
             if row_date == target_date:
-                self.client.update_values(
-                    self.spreadsheet_id,
+                await self._write_values(
                     f"{TRAININGS_SHEET}!A{idx}:C{idx}",
                     [[target_date, training.get("timing", ""), training.get("description", "")]],
                 )
@@ -243,18 +694,14 @@ class SheetsService:
                 break
 
         if insert_idx is None:
-            self.client.append_values(
-                self.spreadsheet_id,
+            await self._append_values(
                 f"{TRAININGS_SHEET}!A:C",
                 [[target_date, training.get("timing", ""), training.get("description", "")]],
             )
             return
 
-        sheet_id = self.client.get_worksheet_properties_by_title(
-            self.spreadsheet_id, TRAININGS_SHEET
-        ).get("sheetId")
-        self.client.batch_update_spreadsheet(
-            self.spreadsheet_id,
+        sheet_id = await self._get_sheet_id(TRAININGS_SHEET)
+        await self._batch_update_spreadsheet(
             [
                 {
                     "insertDimension": {
@@ -269,23 +716,17 @@ class SheetsService:
                 }
             ],
         )
-        self.client.update_values(
-            self.spreadsheet_id,
+        await self._write_values(
             f"{TRAININGS_SHEET}!A{insert_idx}:C{insert_idx}",
             [[target_date, training.get("timing", ""), training.get("description", "")]],
         )
 
-    def _delete_training_row(self, training_date):
-        self._ensure_sheet_exists(TRAININGS_SHEET, TRAININGS_HEADERS)
-        rows = self.client.get_values(self.spreadsheet_id, f"{TRAININGS_SHEET}!A2:C")
+    async def _delete_training_row(self, training_date, rows):
         for idx, row in enumerate(rows, start=2):
             row_date = row[0].strip() if len(row) > 0 else ""
             if row_date == training_date:
-                sheet_id = self.client.get_worksheet_properties_by_title(
-                    self.spreadsheet_id, TRAININGS_SHEET
-                ).get("sheetId")
-                self.client.batch_update_spreadsheet(
-                    self.spreadsheet_id,
+                sheet_id = await self._get_sheet_id(TRAININGS_SHEET)
+                await self._batch_update_spreadsheet(
                     [
                         {
                             "deleteDimension": {
@@ -302,7 +743,7 @@ class SheetsService:
                 return True
         return False
 
-    def _append_poll_meta(
+    def _build_poll_meta(
         self,
         poll_id,
         poll_type,
@@ -312,97 +753,57 @@ class SheetsService:
         target_user_id=None,
         message_link=None,
     ):
-        self._ensure_sheet_exists(POLLS_SHEET, POLLS_HEADERS)
-        created_at = datetime.utcnow().isoformat()
-        self.client.append_values(
-            self.spreadsheet_id,
-            f"{POLLS_SHEET}!A:H",
+        return build_poll_meta_from_row(
             [
-                [
-                    poll_id,
-                    poll_type,
-                    training_date or "",
-                    str(chat_id or ""),
-                    str(message_id or ""),
-                    message_link or "",
-                    str(target_user_id or ""),
-                    created_at,
-                ]
-            ],
+                poll_id,
+                poll_type,
+                training_date or "",
+                str(chat_id or ""),
+                str(message_id or ""),
+                message_link or "",
+                str(target_user_id or ""),
+                datetime.utcnow().isoformat(),
+            ]
         )
 
-    def _get_poll_meta(self, poll_id):
-        self._ensure_sheet_exists(POLLS_SHEET, POLLS_HEADERS)
-        rows = self.client.get_values(self.spreadsheet_id, f"{POLLS_SHEET}!A2:H")
-        for row in rows:
-            if len(row) > 0 and row[0] == poll_id:
-                return {
-                    "poll_id": row[0],
-                    "poll_type": row[1] if len(row) > 1 else "",
-                    "training_date": row[2] if len(row) > 2 else "",
-                    "chat_id": row[3] if len(row) > 3 else "",
-                    "message_id": row[4] if len(row) > 4 else "",
-                    "message_link": row[5] if len(row) > 5 else "",
-                    "target_user_id": row[6] if len(row) > 6 else "",
-                    "created_at": row[7] if len(row) > 7 else "",
-                }
-        return None
-
-    def _get_latest_training_poll_meta(self, training_date):
-        self._ensure_sheet_exists(POLLS_SHEET, POLLS_HEADERS)
-        rows = self.client.get_values(self.spreadsheet_id, f"{POLLS_SHEET}!A2:H")
-        for row in reversed(rows):
-            if len(row) > 2 and row[2] == training_date and row[1] == "training":
-                return {
-                    "poll_id": row[0],
-                    "poll_type": row[1],
-                    "training_date": row[2],
-                    "chat_id": row[3] if len(row) > 3 else "",
-                    "message_id": row[4] if len(row) > 4 else "",
-                    "message_link": row[5] if len(row) > 5 else "",
-                    "target_user_id": row[6] if len(row) > 6 else "",
-                    "created_at": row[7] if len(row) > 7 else "",
-                }
-        return None
-
-    def _ensure_sheet_properties(self):
-        properties = self.client.get_worksheet_properties_by_title(
+    async def _append_poll_metas(self, poll_metas):
+        if not poll_metas:
+            return
+        await self.ensure_schema()
+        # Under the lease so the append bumps the sheet version for other instances' poll indexes.
+        async with self._hold_layout_lease():
+            await self._append_values(
+                f"{POLLS_SHEET}!A:H",
+                [build_row_from_poll_meta(poll_meta) for poll_meta in poll_metas],
+            )
+            for poll_meta in poll_metas:
+                self._poll_index.add(poll_meta)
+
+    async def _get_poll_meta(self, poll_id):
+        poll_meta = self._poll_index.get(poll_id) if self._poll_index.loaded else None
+        if poll_meta is None:
+            # Another container may have created the poll since we last read the sheet.
+            await self._load_poll_index()
+            poll_meta = self._poll_index.get(poll_id)
+        return poll_meta
+
+    async def _load_poll_index(self):
+        rows = await self._read_table(POLLS_SHEET, POLLS_HEADERS)
+        self._poll_index.load(rows)
+
+    async def _ensure_sheet_properties(self):
+        properties = await self.client.get_worksheet_properties_by_title(
             self.spreadsheet_id, self.sheet_name
         )
         if properties:
             return properties
-        return self.client.create_worksheet(self.spreadsheet_id, self.sheet_name)
-
-    def _clear_conditional_formatting(self, sheet_id):
-        if self._conditional_formats_cleared:
-            return
-        spreadsheet = self.client.get_spreadsheet(
-            self.spreadsheet_id,
-            fields="sheets(properties.sheetId,properties.title,conditionalFormats)",
-        )
-        target_sheet = None
-        for sheet in spreadsheet.get("sheets", []):
-            properties = sheet.get("properties", {})
-            if properties.get("sheetId") == sheet_id:
-                target_sheet = sheet
-                break
-
-        conditional_formats = (target_sheet or {}).get("conditionalFormats", [])
-        if not conditional_formats:
-            self._conditional_formats_cleared = True
-            return
+        return await self.client.create_worksheet(self.spreadsheet_id, self.sheet_name)
 
-        requests = [
-            {
-                "deleteConditionalFormatRule": {
-                    "sheetId": sheet_id,
-                    "index": index,
-                }
-            }
-            for index in reversed(range(len(conditional_formats)))
-        ]
-        self.client.batch_update_spreadsheet(self.spreadsheet_id, requests)
-        self._conditional_formats_cleared = True
+    def _build_member_item(self, user):
+        return {
+            "name": " ".join(part for part in [user.first_name, user.last_name] if part),
+            "handle": f"@{user.username}" if user.username else "",
+        }
 
     def _normalize_member_for_sheet(self, member):
         name = (member.get("name") or "").strip()
@@ -411,28 +812,6 @@ class SheetsService:
             name = handle.lstrip("@")
         return {"name": name, "telegram": handle}
 
-    def _build_member_identity_key_from_sheet_row(self, row_values):
-        if not row_values:
-            return None
-
-        member_name = str(row_values[0]).strip() if len(row_values) > 0 else ""
-        member_telegram = ""
-        if len(row_values) > 1:
-            member_telegram = normalize_telegram_handle(row_values[1])
-
-        if not member_name and not member_telegram:
-            return None
-
-        if not member_name and member_telegram:
-            member_name = member_telegram.lstrip("@")
-
-        member = {"name": member_name, "telegram": member_telegram}
-        return build_member_identity_key(member)
-
-    def _get_sheet_member_rows(self):
-        member_range = f"{self.sheet_name}!A{DATA_START_ROW}:B"
-        return self.client.get_values(self.spreadsheet_id, member_range)
-
     def _build_training_days_from_items(self, training_items):
         days = []
         for item in training_items:
@@ -441,121 +820,134 @@ class SheetsService:
                 days.append({"date": date_value, "label": item.get("description") or None})
         return sorted(days, key=lambda item: item["date"])
 
-    def _ensure_training_columns(self, training_items):
-        training_days = self._build_training_days_from_items(training_items)
-        sheet_properties = self._ensure_sheet_properties()
+    async def _ensure_training_columns(self, snapshot):
+        training_days = self._build_training_days_from_items(snapshot["trainings"])
+        sheet_properties = snapshot["sheet_properties"]
         sheet_id = sheet_properties.get("sheetId")
         column_count = sheet_properties.get("gridProperties", {}).get("columnCount", 26)
         if sheet_id is None:
             raise ValueError("Unable to resolve target sheet id.")
+        if self._layout_lock_mode.get() == LAYOUT_SHARED and not self._layout_is_current(
+            training_days, column_count, snapshot["grid"]
+        ):
+            raise _LayoutChangeRequired()
 
-        layout_info = self._ensure_sheet_layout(sheet_id, column_count, training_days)
-        self._ensure_total_formulas(
-            layout_info.get("total_column_index"),
-            layout_info.get("date_columns", {}),
+        layout_info = await self._ensure_sheet_layout(
+            sheet_id,
+            column_count,
+            training_days,
+            snapshot["grid"],
         )
+        if layout_info.get("changed"):
+            # The totals formula only needs rewriting when date columns move.
+            await self._ensure_total_formulas(
+                layout_info.get("total_column_index"),
+                layout_info.get("date_columns", {}),
+                snapshot["grid"],
+            )
         return layout_info
 
-    def _get_member_row_index(self, member):
-        member_rows = self._get_sheet_member_rows()
-        member_key = build_member_identity_key(member)
-        for index, row in enumerate(member_rows):
-            row_key = self._build_member_identity_key_from_sheet_row(row)
-            if row_key and row_key == member_key:
-                return DATA_START_ROW + index
-        return None
+    def _layout_is_current(self, training_days, column_count, grid):
+        # Mirrors _ensure_sheet_layout: True when it would neither insert columns nor rewrite headers.
+        total_column_index = grid.total_column_index
+        if not grid.has_expected_table or total_column_index is None:
+            return False
+        if total_column_index + 1 > column_count:
+            return False
+        if any(day["date"] not in grid.date_columns for day in training_days):
+            return False
+        header_rows = self._build_header_rows(dict(grid.date_columns), total_column_index)
+        return self._header_rows_match(grid.header_rows, header_rows)
 
-    def _append_member_row(self, member):
-        member_rows = self._get_sheet_member_rows()
-        self.client.append_values(
-            self.spreadsheet_id,
+    async def _append_member_rows(self, members, grid):
+        response = await self._append_values(
             f"{self.sheet_name}!A:B",
-            [[member["name"], member["telegram"]]],
+            [[member["name"], member["telegram"]] for member in members],
             value_input_option="RAW",
             insert_data_option="INSERT_ROWS",
         )
-        return DATA_START_ROW + len(member_rows)
-
-    def _ensure_member_row(self, member, layout_info=None):
-        row_index = self._get_member_row_index(member)
-        if row_index is not None:
-            return row_index, False
-        row_index = self._append_member_row(member)
-        if layout_info:
-            self._set_total_formula_for_row(
-                row_index,
-                layout_info.get("total_column_index"),
-                layout_info.get("date_columns", {}),
-            )
-        return row_index, True
-
-    def _update_attendance_cell(self, row_index, column_index, status):
+        # The append lands after the sheet's last non-empty row, which may not be ours to know.
+        updated_range = ((response or {}).get("updates") or {}).get("updatedRange")
+        if updated_range:
+            _, start_row_index, _ = parse_range_start(updated_range)
+        else:
+            start_row_index = grid.last_row_index + 1
+        for offset, member in enumerate(members):
+            grid.add_member_row(member, start_row_index + offset)
+
+    async def _ensure_member_rows(self, members, grid):
+        if all(grid.find_member_row(member) is not None for member in members):
+            return [grid.find_member_row(member) for member in members]
+        # Checked again under the lock: a concurrent unit may have just appended the same member.
+        async with self._locks.get()["roster"], self._hold_layout_lease():
+            if self._attendance_grid is not None:
+                # A grid reloaded since our snapshot has seen every append made after it.
+                grid = self._attendance_grid
+            else:
+                # Dropped because another instance changed the sheet (or a unit failed).
+                snapshot_date_columns = grid.date_columns
+                grid = await self._reload_attendance_grid()
+                if (
+                    grid.date_columns != snapshot_date_columns
+                    and self._layout_lock_mode.get() == LAYOUT_SHARED
+                ):
+                    # Our column indexes are stale; redo the unit under the exclusive lock.
+                    raise _LayoutChangeRequired()
+            missing_members = {}
+            for member in members:
+                if grid.find_member_row(member) is None:
+                    missing_members.setdefault(build_member_identity_key(member), member)
+            if missing_members:
+                await self._append_member_rows(list(missing_members.values()), grid)
+        return [grid.find_member_row(member) for member in members]
+
+    async def _update_attendance_cell(self, row_index, column_index, status):
         column_letter = convert_column_index_to_letter(column_index)
         range_name = f"{self.sheet_name}!{column_letter}{row_index}"
-        self.client.update_values(self.spreadsheet_id, range_name, [[status]], value_input_option="RAW")
+        await self._write_values(range_name, [[status]], value_input_option="RAW")
 
-    def _build_total_formula(self, row_index, date_columns):
+    def _build_total_formula(self, date_columns):
         if not date_columns:
             return None
-        first_index = min(date_columns.values())
-        last_index = max(date_columns.values())
-        first_col = convert_column_index_to_letter(first_index)
-        last_col = convert_column_index_to_letter(last_index)
-        return f"=SUM({first_col}{row_index}:{last_col}{row_index})"
-
-    def _set_total_formula_for_row(self, row_index, total_column_index, date_columns):
-        if total_column_index is None:
-            return
-        formula = self._build_total_formula(row_index, date_columns)
-        if not formula:
-            return
-        column_letter = convert_column_index_to_letter(total_column_index)
-        range_name = f"{self.sheet_name}!{column_letter}{row_index}"
-        self.client.update_values(
-            self.spreadsheet_id,
-            range_name,
-            [[formula]],
-            value_input_option="USER_ENTERED",
+        first_col = convert_column_index_to_letter(min(date_columns.values()))
+        last_col = convert_column_index_to_letter(max(date_columns.values()))
+        # Anchored in the second header row so it covers members appended later.
+        anchor_row = HEADER_ROW_COUNT
+        return (
+            f'=ARRAYFORMULA(IF(ROW(A{anchor_row}:A)<{DATA_START_ROW}, "", '
+            f'IF(LEN(A{anchor_row}:A&B{anchor_row}:B), '
+            f"MMULT(IFERROR({first_col}{anchor_row}:{last_col}*1, 0), "
+            f'TRANSPOSE(COLUMN({first_col}{anchor_row}:{last_col}{anchor_row})^0)), "")))'
         )
 
-    def _ensure_total_formulas(self, total_column_index, date_columns):
-        if total_column_index is None or not date_columns:
+    async def _ensure_total_formulas(self, total_column_index, date_columns, grid):
+        formula = self._build_total_formula(date_columns)
+        if total_column_index is None or not formula:
             return
-        member_rows = self._get_sheet_member_rows()
-        if not member_rows:
-            return
-        start_row = DATA_START_ROW
-        end_row = DATA_START_ROW + len(member_rows) - 1
         column_letter = convert_column_index_to_letter(total_column_index)
-        range_name = f"{self.sheet_name}!{column_letter}{start_row}:{column_letter}{end_row}"
-        values = [
-            [self._build_total_formula(row_index, date_columns)]
-            for row_index in range(start_row, end_row + 1)
-        ]
-        self.client.update_values(
-            self.spreadsheet_id,
-            range_name,
-            values,
+        if grid.rows:
+            # Per-row SUM formulas from older layouts would block the array formula's output.
+            await self._write_values(
+                f"{self.sheet_name}!{column_letter}{DATA_START_ROW}:{column_letter}{grid.last_row_index}",
+                [[""] for _ in grid.rows],
+                value_input_option="RAW",
+            )
+        await self._write_values(
+            f"{self.sheet_name}!{column_letter}{HEADER_ROW_COUNT}",
+            [[formula]],
             value_input_option="USER_ENTERED",
         )
 
-    def _remove_training_column(self, training_date):
-        sheet_properties = self._ensure_sheet_properties()
+    async def _remove_training_column(self, training_date, sheet_properties, grid):
         sheet_id = sheet_properties.get("sheetId")
-        column_count = sheet_properties.get("gridProperties", {}).get("columnCount", 26)
         if sheet_id is None:
             raise ValueError("Unable to resolve target sheet id.")
 
-        header_row_one, header_row_two = self.client.get_header_rows(
-            self.spreadsheet_id, self.sheet_name, column_count
-        )
-        _, date_columns, _ = self._parse_existing_layout(header_row_one, header_row_two)
-        if training_date not in date_columns:
+        column_index = grid.date_columns.get(training_date)
+        if column_index is None:
             return False
 
-        column_index = date_columns[training_date]
-        self.client.batch_update_spreadsheet(
-            self.spreadsheet_id,
+        await self._batch_update_spreadsheet(
             [
                 {
                     "deleteDimension": {
@@ -569,75 +961,23 @@ class SheetsService:
                 }
             ],
         )
+        grid.remove_column(column_index)
         return True
 
-    def _normalize_cell(self, value):
-        if value is None:
-            return ""
-        return str(value).strip()
-
     def _format_training_date_for_header(self, date_value):
         parsed_date = datetime.strptime(date_value, "%Y-%m-%d").date()
         return parsed_date.strftime("%d %b %Y (%A)").lstrip("0")
 
-    def _parse_training_date_from_header(self, cell_value):
-        if not cell_value:
-            return None
-
-        normalized_value = cell_value.strip()
-        if DATE_HEADER_PATTERN.match(normalized_value):
-            return normalized_value
-
-        for display_format in DISPLAY_DATE_FORMATS:
-            try:
-                parsed_date = datetime.strptime(normalized_value, display_format).date()
-                return parsed_date.isoformat()
-            except ValueError:
-                continue
-
-        return None
-
-    def _parse_existing_layout(self, header_row_one, header_row_two):
-        normalized_row_one = [self._normalize_cell(value) for value in header_row_one]
-        normalized_row_two = [self._normalize_cell(value) for value in header_row_two]
-
-        member_column_count = len(MEMBER_COLUMNS)
-        has_expected_table = (
-            len(normalized_row_two) >= member_column_count
-            and normalized_row_two[:member_column_count] == MEMBER_COLUMNS
-        )
-
-        date_columns = {}
-        for column_index, cell_value in enumerate(normalized_row_two):
-            parsed_date = self._parse_training_date_from_header(cell_value)
-            if parsed_date:
-                date_columns[parsed_date] = column_index
-
-        total_column_index = None
-        for column_index, cell_value in enumerate(normalized_row_one):
-            if cell_value == TOTAL_LABEL:
-                total_column_index = column_index
-                break
-
-        if total_column_index is None:
-            for column_index, cell_value in enumerate(normalized_row_two):
-                if cell_value == TOTAL_LABEL:
-                    total_column_index = column_index
-                    break
-
-        return has_expected_table, date_columns, total_column_index
-
     def _shift_date_columns(self, date_columns, start_index):
         for date_value in list(date_columns.keys()):
             if date_columns[date_value] >= start_index:
                 date_columns[date_value] += 1
 
-    def _ensure_column_capacity(self, sheet_id, existing_count, required_count):
+    async def _ensure_column_capacity(self, sheet_id, existing_count, required_count):
         if required_count <= existing_count:
             return
 
-        self.client.batch_update_spreadsheet(
-            self.spreadsheet_id,
+        await self._batch_update_spreadsheet(
             [
                 {
                     "insertDimension": {
@@ -671,25 +1011,30 @@ class SheetsService:
             row_one[first_date_column_index] = TRAINING_DATES_LABEL
 
         row_one[total_column_index] = TOTAL_LABEL
+        # Left unset so the header write never clobbers the totals array formula.
+        row_two[total_column_index] = None
         return [row_one, row_two]
 
-    def _write_header_rows(self, date_columns, total_column_index):
-        header_rows = self._build_header_rows(date_columns, total_column_index)
+    def _header_rows_match(self, existing_rows, header_rows):
+        for existing_row, header_row in zip(existing_rows, header_rows):
+            for column_index, header_value in enumerate(header_row):
+                if header_value is None:
+                    continue
+                existing_value = existing_row[column_index] if column_index < len(existing_row) else ""
+                if existing_value != header_value:
+                    return False
+        return True
+
+    async def _write_header_rows(self, header_rows, total_column_index, grid):
         last_column_letter = convert_column_index_to_letter(total_column_index)
         header_range = f"{self.sheet_name}!A1:{last_column_letter}2"
-        self.client.update_values(self.spreadsheet_id, header_range, header_rows, value_input_option="RAW")
+        await self._write_values(header_range, header_rows, value_input_option="RAW")
+        grid.set_header_rows(header_rows)
 
-    def _ensure_sheet_layout(self, sheet_id, column_count, training_days):
-        self._clear_conditional_formatting(sheet_id)
-        header_row_one, header_row_two = self.client.get_header_rows(
-            self.spreadsheet_id,
-            self.sheet_name,
-            column_count,
-        )
-        has_expected_table, date_columns, total_column_index = self._parse_existing_layout(
-            header_row_one,
-            header_row_two,
-        )
+    async def _ensure_sheet_layout(self, sheet_id, column_count, training_days, grid):
+        has_expected_table = grid.has_expected_table
+        date_columns = dict(grid.date_columns)
+        total_column_index = grid.total_column_index
 
         training_dates = [day.get("date") for day in training_days if day.get("date")]
         member_column_count = len(MEMBER_COLUMNS)
@@ -700,9 +1045,14 @@ class SheetsService:
                 for index, date_value in enumerate(training_dates)
             }
             total_column_index = member_column_count + len(date_columns)
-            self._ensure_column_capacity(sheet_id, column_count, total_column_index + 1)
-            self._write_header_rows(date_columns, total_column_index)
-            return {"date_columns": date_columns, "total_column_index": total_column_index}
+            await self._ensure_column_capacity(sheet_id, column_count, total_column_index + 1)
+            header_rows = self._build_header_rows(date_columns, total_column_index)
+            await self._write_header_rows(header_rows, total_column_index, grid)
+            return {
+                "date_columns": date_columns,
+                "total_column_index": total_column_index,
+                "changed": True,
+            }
 
         missing_dates = [date_value for date_value in training_dates if date_value not in date_columns]
         insert_requests = []
@@ -749,8 +1099,30 @@ class SheetsService:
             )
 
         if insert_requests:
-            self.client.batch_update_spreadsheet(self.spreadsheet_id, insert_requests)
+            await self._batch_update_spreadsheet(insert_requests)
+            for request in insert_requests:
+                grid.insert_column(request["insertDimension"]["range"]["startIndex"])
 
-        self._ensure_column_capacity(sheet_id, column_count, total_column_index + 1)
-        self._write_header_rows(date_columns, total_column_index)
-        return {"date_columns": date_columns, "total_column_index": total_column_index}
+        await self._ensure_column_capacity(sheet_id, column_count, total_column_index + 1)
+        header_rows = self._build_header_rows(date_columns, total_column_index)
+        layout_changed = bool(insert_requests) or not self._header_rows_match(
+            grid.header_rows, header_rows
+        )
+        if layout_changed:
+            await self._write_header_rows(header_rows, total_column_index, grid)
+        return {
+            "date_columns": date_columns,
+            "total_column_index": total_column_index,
+            "changed": layout_changed,
+        }
+
+
+def _parse_sheet_version(values):
+    value = str(values[0][0]).strip() if values and values[0] else ""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        # Hand-edited garbage still compares equal between reads; the next bump replaces it.
+        return 0
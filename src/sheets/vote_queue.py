@@ -0,0 +1,107 @@
+"""Write-behind queue that coalesces poll answers into batched attendance writes."""
+
+import asyncio
+from contextlib import contextmanager
+import logging
+
+from ..constants import (
+    VOTE_QUEUE_FLUSH_INTERVAL_SECONDS,
+    VOTE_QUEUE_MAX_BATCH_SIZE,
+    VOTE_QUEUE_MAX_FLUSH_ATTEMPTS,
+)
+from .common import SheetsRetryableError
+from .locks import LoopBound
+
+
+logger = logging.getLogger(__name__)
+
+
+class VoteQueue:
+    def __init__(
+        self,
+        sheets_service,
+        max_batch_size=VOTE_QUEUE_MAX_BATCH_SIZE,
+        flush_interval=VOTE_QUEUE_FLUSH_INTERVAL_SECONDS,
+        max_flush_attempts=VOTE_QUEUE_MAX_FLUSH_ATTEMPTS,
+    ):
+        self.sheets_service = sheets_service
+        self.max_batch_size = max_batch_size
+        # None disables the timer; the caller flushes explicitly (end of a Lambda invocation).
+        self.flush_interval = flush_interval
+        self.max_flush_attempts = max_flush_attempts
+        self._pending = {}
+        self._failed_flushes = 0
+        self._flush_task = None
+        self._hold_count = 0
+        self._flush_lock = LoopBound(asyncio.Lock)
+
+    def __len__(self):
+        return len(self._pending)
+
+    async def add(self, user, training_date, status):
+        key = (user.id, training_date)
+        # Re-inserting keeps a changed answer in arrival order; only the last one is written.
+        self._pending.pop(key, None)
+        self._pending[key] = (user, training_date, status)
+        if self._hold_count:
+            return
+        if len(self._pending) >= self.max_batch_size:
+            await self.flush()
+            return
+        self._schedule_flush()
+
+    @contextmanager
+    def hold(self):
+        # While held, answers only accumulate; the caller flushes them as one batch.
+        self._hold_count += 1
+        try:
+            yield self
+        finally:
+            self._hold_count -= 1
+
+    async def flush(self):
+        # One flush at a time: overlapping batches could land out of order, letting an older
+        # answer overwrite a newer one.
+        async with self._flush_lock.get():
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+            try:
+                await self.sheets_service.record_poll_answers(list(pending.values()))
+            except SheetsRetryableError:
+                self._failed_flushes += 1
+                if self._failed_flushes >= self.max_flush_attempts:
+                    self._drop(pending)
+                    raise
+                # Keep the answers for the next flush unless the user has answered again since.
+                for key, answer in pending.items():
+                    self._pending.setdefault(key, answer)
+                raise
+            except Exception:
+                # A rejected batch would fail the same way on every retry.
+                self._drop(pending)
+                raise
+            self._failed_flushes = 0
+            return len(pending)
+
+    def _drop(self, pending):
+        self._failed_flushes = 0
+        logger.error("Dropping %s queued poll answers that could not be written.", len(pending))
+
+    def _schedule_flush(self):
+        if self.flush_interval is None:
+            return
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to flush queued poll answers.")
+            self._flush_task = None
+            # Only retryable failures leave answers behind, and those are capped by flush().
+            if self._pending:
+                self._schedule_flush()
@@ -0,0 +1,56 @@
+"""Read-only view of one week's trainings, latest polls and votes, built from a single snapshot."""
+
+
+class WeekContext:
+    def __init__(self, start_date, end_date, trainings=(), latest_polls=None, members=(), votes=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.trainings = list(trainings)
+        self._latest_polls = latest_polls or {}
+        self.members = list(members)
+        # training date -> one cell value per entry in self.members.
+        self.votes = votes or {}
+
+    @classmethod
+    def from_snapshot(cls, start_date, end_date, trainings, poll_index, grid, date_columns):
+        week_trainings = [
+            training
+            for training in trainings
+            if start_date <= training.get("date", "") <= end_date
+        ]
+        members = []
+        row_indexes = []
+        for row_index, row in grid.iter_member_rows():
+            members.append({"name": row[0], "handle": row[1] if len(row) > 1 else ""})
+            row_indexes.append(row_index)
+
+        latest_polls = {}
+        votes = {}
+        for training in week_trainings:
+            training_date = training["date"]
+            latest_polls[training_date] = poll_index.get_latest(training_date)
+            column_index = date_columns.get(training_date)
+            if column_index is not None:
+                votes[training_date] = [
+                    grid.get_cell(row_index, column_index) for row_index in row_indexes
+                ]
+        return cls(start_date, end_date, week_trainings, latest_polls, members, votes)
+
+    def get_training(self, training_date):
+        for training in self.trainings:
+            if training["date"] == training_date:
+                return training
+        return None
+
+    def get_latest_poll(self, training_date):
+        return self._latest_polls.get(training_date)
+
+    def find_members_missing_vote(self, training_date):
+        votes = self.votes.get(training_date)
+        if votes is None:
+            return []
+        return [
+            member
+            for member, vote in zip(self.members, votes)
+            if member["handle"] and not vote
+        ]
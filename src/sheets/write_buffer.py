@@ -0,0 +1,118 @@
+"""Coalescing buffer for values writes flushed as values.batchUpdate calls."""
+
+from .common import convert_column_index_to_letter, parse_range_start
+
+
+VALUE_INPUT_OPTIONS = ("RAW", "USER_ENTERED")
+
+
+class ValueWriteBuffer:
+    def __init__(self):
+        self._writes = []
+
+    def __bool__(self):
+        return bool(self._writes)
+
+    def __len__(self):
+        return len(self._writes)
+
+    def add(self, range_name, values, value_input_option="RAW"):
+        if value_input_option not in VALUE_INPUT_OPTIONS:
+            raise ValueError(f"Unsupported value input option: {value_input_option}")
+        sheet_name, start_row, start_column = parse_range_start(range_name)
+        cells = {}
+        for row_offset, row_values in enumerate(values):
+            for column_offset, value in enumerate(row_values):
+                if value is None:
+                    # Null cells leave the sheet untouched, so they must not mask other writes.
+                    continue
+                cells[(start_row + row_offset, start_column + column_offset)] = value
+        if not cells:
+            return
+
+        pending = _PendingWrite(sheet_name, value_input_option, cells)
+        remaining = []
+        for write in self._writes:
+            if write.sheet_name == sheet_name and write.value_input_option != value_input_option:
+                # A later write with the other input option wins for shared cells.
+                write.discard_cells(pending.cells)
+                if not write.cells:
+                    continue
+            remaining.append(write)
+        self._writes = remaining
+        self._merge(pending)
+
+    def build_data(self, value_input_option):
+        return [
+            write.to_value_range()
+            for write in self._writes
+            if write.value_input_option == value_input_option
+        ]
+
+    def clear(self):
+        self._writes = []
+
+    async def flush(self, client, spreadsheet_id):
+        if not self._writes:
+            return
+        batches = [(option, self.build_data(option)) for option in VALUE_INPUT_OPTIONS]
+        self.clear()
+        for value_input_option, data in batches:
+            await client.batch_update_values(
+                spreadsheet_id, data, value_input_option=value_input_option
+            )
+
+    def _merge(self, pending):
+        merged = True
+        while merged:
+            merged = False
+            for write in self._writes:
+                if write.can_merge(pending):
+                    self._writes.remove(write)
+                    write.cells.update(pending.cells)
+                    pending = write
+                    merged = True
+                    break
+        self._writes.append(pending)
+
+
+class _PendingWrite:
+    def __init__(self, sheet_name, value_input_option, cells):
+        self.sheet_name = sheet_name
+        self.value_input_option = value_input_option
+        self.cells = cells
+
+    def bounds(self):
+        rows = [row for row, _ in self.cells]
+        columns = [column for _, column in self.cells]
+        return min(rows), min(columns), max(rows), max(columns)
+
+    def can_merge(self, other):
+        if (self.sheet_name, self.value_input_option) != (other.sheet_name, other.value_input_option):
+            return False
+        top, left, bottom, right = self.bounds()
+        other_top, other_left, other_bottom, other_right = other.bounds()
+        # Overlapping or edge-adjacent rectangles share one range.
+        return (
+            other_top <= bottom + 1
+            and top <= other_bottom + 1
+            and other_left <= right + 1
+            and left <= other_right + 1
+        )
+
+    def discard_cells(self, cells):
+        for cell in cells:
+            self.cells.pop(cell, None)
+
+    def to_value_range(self):
+        top, left, bottom, right = self.bounds()
+        # Null cells are skipped by the Sheets API, so gaps keep their current value.
+        values = [
+            [self.cells.get((row, column)) for column in range(left, right + 1)]
+            for row in range(top, bottom + 1)
+        ]
+        start = f"{convert_column_index_to_letter(left)}{top}"
+        end = f"{convert_column_index_to_letter(right)}{bottom}"
+        cell_range = start if start == end else f"{start}:{end}"
+        return {"range": f"{self.sheet_name}!{cell_range}", "values": values}
+